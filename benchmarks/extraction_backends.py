@@ -0,0 +1,77 @@
+"""Compare the 'expr' and 'poly' coefficient extraction backends of
+`lmi_to_coeffs` on a few typical LMI shapes.
+
+Each case is timed with dense and with scipy.sparse coefficients (if scipy
+is available); the median of several runs is reported, after a warm-up run
+so that SymPy's caches are filled for both backends alike. As in timeit,
+garbage collection is disabled while timing.
+
+Usage: python benchmarks/extraction_backends.py [samples]
+"""
+from __future__ import print_function
+
+import gc
+import sys
+import time
+
+from sympy import Matrix, symbols
+
+from lmi_sdp import LMI_PSD, lmi_to_coeffs
+
+
+def _lyapunov(n):
+    P = Matrix(n, n, lambda i, j: symbols('p%d_%d' % (min(i, j), max(i, j))))
+    A = Matrix(n, n, lambda i, j: ((i * 7 + j * 3) % 5 - 2) * 0.5)
+    return [LMI_PSD(-(A.T*P + P*A))], sorted(P.free_symbols, key=str)
+
+
+def _small_blocks(nblocks, nvars):
+    x = symbols('x0:%d' % nvars)
+    lmis = [LMI_PSD(Matrix([[sum(x[(3*k + i) % nvars] * (i + 1)
+                                 for i in range(3)) + 1]]))
+            for k in range(nblocks)]
+    return lmis, x
+
+
+def _many_vars(n, nvars):
+    x = symbols('x0:%d' % nvars)
+    M = Matrix(n, n, lambda i, j: x[(i*n + j) % nvars] +
+               x[(i*n + j + 7) % nvars] + 1)
+    return [LMI_PSD(M + M.T)], x
+
+
+def _time(lmis, variables, samples, **kwargs):
+    lmi_to_coeffs(lmis, variables, **kwargs)
+    times = []
+    for i in range(samples):
+        gc.collect()
+        gc.disable()
+        start = time.time()
+        lmi_to_coeffs(lmis, variables, **kwargs)
+        times.append(time.time() - start)
+        gc.enable()
+    return sorted(times)[len(times) // 2]
+
+
+def main(samples=5):
+    try:
+        import scipy  # noqa: F401
+    except ImportError:
+        sparse_options = [False]
+    else:
+        sparse_options = [False, True]
+    cases = [('Lyapunov 6x6', _lyapunov(6)),
+             ('Lyapunov 12x12', _lyapunov(12)),
+             ('100 1x1 blocks, 300 vars', _small_blocks(100, 300)),
+             ('4x4, 1500 vars', _many_vars(4, 1500))]
+    print('%-26s %-7s %9s %9s' % ('case', 'sparse', 'expr', 'poly'))
+    for name, (lmis, variables) in cases:
+        for sparse in sparse_options:
+            expr, poly = [_time(lmis, variables, samples, sparse=sparse,
+                                backend=backend)
+                          for backend in ('expr', 'poly')]
+            print('%-26s %-7s %8.4fs %8.4fs' % (name, sparse, expr, poly))
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
@@ -0,0 +1,39 @@
+"""Measure the startup cost of `import lmi_sdp`.
+
+Each sample runs a fresh interpreter, so module caches do not hide the cost.
+The baseline `import sympy, numpy` time is reported too, since those are
+required dependencies; the difference is what lmi_sdp itself adds.
+
+Usage: python benchmarks/import_time.py [samples]
+"""
+from __future__ import print_function
+
+import subprocess
+import sys
+import time
+
+
+def _time_import(statement, samples):
+    times = []
+    for i in range(samples):
+        start = time.time()
+        subprocess.check_call([sys.executable, '-c', statement])
+        times.append(time.time() - start)
+    return sorted(times)[len(times) // 2]
+
+
+def main(samples=5):
+    base = _time_import('import sympy, numpy', samples)
+    full = _time_import('import lmi_sdp', samples)
+    loaded = subprocess.check_output([
+        sys.executable, '-c',
+        'import sys, lmi_sdp; print(", ".join(m for m in '
+        '("scipy", "cvxopt", "packaging") if m in sys.modules) or "none")'])
+    print('import sympy, numpy: %.3f s (median of %d)' % (base, samples))
+    print('import lmi_sdp:      %.3f s (median of %d)' % (full, samples))
+    print('lmi_sdp overhead:    %.3f s' % (full - base))
+    print('optional modules loaded at import: %s' % loaded.decode().strip())
+
+
+if __name__ == '__main__':
+    main(*[int(a) for a in sys.argv[1:]])
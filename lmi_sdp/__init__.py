@@ -5,3 +5,13 @@ __version__ = '1.1.1'
 from .lm import *
 from .lmi import *
 from .sdp import *
+from .chordal import *
+from .storage import *
+from .operators import *
+from .scaling import *
+from .results import *
+from .aio import *
+from .lowrank import *
+from .algebra import *
+from .report import *
+from .grid import *
@@ -0,0 +1,223 @@
+"""Asyncio variants of the problem exporters"""
+
+__all__ = ['CoeffCache', 'coeff_cache', 'get_executor', 'shutdown_executor',
+           'ato_cvxopt', 'ato_sdpa_sparse']
+
+import threading
+from collections import OrderedDict
+from functools import partial
+
+from .lm import _optional_import, lm_sym_to_coeffs
+from .sdp import NotAvailableError, split_constraints, _iter_slms, \
+    _problem_to_coeffs, _cvxopt_from_coeffs, _sdpa_sparse_from_coeffs
+
+
+def _nbytes(value):
+    """Helper function returning the bytes of the numpy arrays held by a
+    cached value (numerical matrices, or tuples and lists of them)."""
+    if isinstance(value, (tuple, list)):
+        return sum(_nbytes(v) for v in value)
+    if hasattr(value, 'indptr'):
+        return value.data.nbytes + value.indices.nbytes + value.indptr.nbytes
+    return getattr(value, 'nbytes', 0)
+
+
+class CoeffCache(object):
+    """Thread-safe least recently used cache of numerical LMI coefficients.
+
+    Entries are keyed by the canonical symbolic matrix of an LMI block, the
+    variables and the sparse flag, so that identical blocks are extracted
+    only once across concurrent conversions. Since they are shared, cached
+    dense arrays are made read-only, and cached sparse matrices are stored
+    as scipy.sparse.csr_matrix with read-only data and index arrays.
+
+    Parameters
+    ----------
+    maxsize: int
+        Maximum number of cached blocks.
+    memory_budget: int
+        Maximum bytes of cached coefficient arrays. Blocks larger than this
+        are not cached.
+    """
+
+    def __init__(self, maxsize=1024, memory_budget=64*2**20):
+        self.maxsize = maxsize
+        self.memory_budget = memory_budget
+        self.nbytes = 0
+        self._data = OrderedDict()
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._data)
+
+    def get(self, key, default=None):
+        with self._lock:
+            try:
+                value, nbytes = self._data.pop(key)
+            except KeyError:
+                return default
+            self._data[key] = value, nbytes
+            return value
+
+    def put(self, key, value):
+        nbytes = _nbytes(value)
+        with self._lock:
+            old = self._data.pop(key, None)
+            if old is not None:
+                self.nbytes -= old[1]
+            if nbytes > self.memory_budget:
+                return
+            self._data[key] = value, nbytes
+            self.nbytes += nbytes
+            while (len(self._data) > self.maxsize or
+                   self.nbytes > self.memory_budget):
+                self.nbytes -= self._data.popitem(last=False)[1][1]
+
+    def clear(self):
+        with self._lock:
+            self._data.clear()
+            self.nbytes = 0
+
+
+coeff_cache = CoeffCache()
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def get_executor():
+    """Return the process-wide executor used by the async exporters,
+    creating it on first use."""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            from concurrent.futures import ThreadPoolExecutor
+            _executor = ThreadPoolExecutor(max_workers=4)
+        return _executor
+
+
+def shutdown_executor(wait=True):
+    """Shut down the process-wide executor (a new one is created on next
+    use)."""
+    global _executor
+    with _executor_lock:
+        executor, _executor = _executor, None
+    if executor is not None:
+        executor.shutdown(wait=wait)
+
+
+def _readonly(m):
+    """Helper function making a numerical matrix read-only (converting
+    sparse matrices to csr)."""
+    if hasattr(m, 'tocsr'):
+        m = m.tocsr()
+        for a in (m.data, m.indices, m.indptr):
+            a.setflags(write=False)
+    elif hasattr(m, 'setflags'):
+        m.setflags(write=False)
+    return m
+
+
+def _canonical_blocks(lmi, split_blocks):
+    """Helper function returning the canonical matrices of the blocks of an
+    LMI (see lmi_to_coeffs)."""
+    return [slm for idx, slm in _iter_slms([lmi], split_blocks)]
+
+
+async def _run(executor, func, *args, **kwargs):
+    """Helper coroutine running func in executor (or in the process-wide
+    executor if None)."""
+    import asyncio
+    loop = asyncio.get_event_loop()
+    return await loop.run_in_executor(executor or get_executor(),
+                                      partial(func, *args, **kwargs))
+
+
+async def _block_coeffs(slm, variables, sparse, executor, cache):
+    """Helper coroutine extracting in executor (or fetching from cache) the
+    coefficients of a canonical LMI block."""
+    if cache is None:
+        return await _run(executor, lm_sym_to_coeffs, slm, variables, sparse)
+    try:
+        hash(slm)
+    except TypeError:
+        slm = slm.as_immutable()
+    key = (slm, tuple(variables), sparse)
+    coeffs = cache.get(key)
+    if coeffs is None:
+        coeffs, const = await _run(executor, lm_sym_to_coeffs, slm,
+                                   variables, sparse)
+        coeffs = ([_readonly(m) for m in coeffs], _readonly(const))
+        cache.put(key, coeffs)
+    return coeffs
+
+
+async def _lmi_coeffs(lmis, variables, split_blocks, sparse, executor,
+                      cache):
+    """Helper coroutine extracting numerical LMIs in the executor, with one
+    job per LMI canonicalization and per block extraction, so that the
+    conversion can be cancelled between blocks.
+
+    Jobs only take and return picklable SymPy and NumPy/SciPy objects, so
+    that executor may be a process pool; the cache stays in this process.
+    """
+    lmi_coeffs = []
+    for lmi in lmis:
+        for slm in await _run(executor, _canonical_blocks, lmi,
+                              split_blocks):
+            lmi_coeffs.append(await _block_coeffs(slm, variables, sparse,
+                                                  executor, cache))
+    return lmi_coeffs
+
+
+async def ato_cvxopt(objective_func, lmis, variables,
+                     objective_type='minimize', split_blocks=True,
+                     eliminate_equalities=False, chordal_decomposition=False,
+                     linear_cone=False, equilibrate=False, executor=None,
+                     cache=coeff_cache):
+    """Asyncio variant of to_cvxopt.
+
+    Canonicalization and extraction, which are CPU-bound SymPy work, run in
+    `executor` (the process-wide thread pool of get_executor if None), one
+    LMI or block at a time, so that the event loop is not blocked and
+    cancelling the awaiting task stops the conversion at the next block.
+    executor may be a concurrent.futures.ProcessPoolExecutor, whose workers
+    do not compete with the event loop for the GIL. The numerical assembly and
+    output, which pass objects that cannot be pickled (iterators, files),
+    always run in the process-wide thread pool. Extracted blocks are shared
+    through `cache` (the process-wide coeff_cache by default, None to
+    disable).
+
+    See to_cvxopt for the other parameters and the returned values.
+    """
+    if _optional_import('cvxopt') is None:
+        raise NotAvailableError(ato_cvxopt.__name__)
+    lmi_coeffs = await _lmi_coeffs(split_constraints(lmis)[0], variables,
+                                   split_blocks, False, executor, cache)
+    coeffs = await _run(None, _problem_to_coeffs, objective_func, lmis,
+                        variables, objective_type, split_blocks, False,
+                        eliminate_equalities, chordal_decomposition,
+                        lmi_coeffs)
+    return await _run(None, _cvxopt_from_coeffs, *coeffs,
+                      linear_cone=linear_cone, equilibrate=equilibrate)
+
+
+async def ato_sdpa_sparse(objective_func, lmis, variables,
+                          objective_type='minimize', split_blocks=True,
+                          comment=None, eliminate_equalities=False,
+                          chordal_decomposition=False, linear_cone=False,
+                          file=None, executor=None, cache=coeff_cache):
+    """Asyncio variant of to_sdpa_sparse (without out_of_core).
+
+    See ato_cvxopt for executor and cache, and to_sdpa_sparse for the other
+    parameters and the returned value.
+    """
+    sparse = _optional_import('scipy.sparse') is not None
+    lmi_coeffs = await _lmi_coeffs(split_constraints(lmis)[0], variables,
+                                   split_blocks, sparse, executor, cache)
+    coeffs = await _run(None, _problem_to_coeffs, objective_func, lmis,
+                        variables, objective_type, split_blocks, sparse,
+                        eliminate_equalities, chordal_decomposition,
+                        lmi_coeffs)
+    return await _run(None, _sdpa_sparse_from_coeffs, *coeffs,
+                      comment=comment, linear_cone=linear_cone, file=file)
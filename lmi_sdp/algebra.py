@@ -0,0 +1,195 @@
+"""Algebra on numerical linear matrices
+
+A numerical linear matrix is a `(coeffs, const)` pair, as returned by
+lm_sym_to_coeffs (or each item of lmi_to_coeffs), standing for
+`const + sum_i x_i*coeffs[i]`. Coefficients may be numpy arrays or scipy
+sparse matrices; results are scipy.sparse.csr_matrix matrices if any
+operand is sparse and numpy arrays otherwise.
+"""
+
+__all__ = ['lm_transpose', 'lm_bmat', 'lm_block_diag', 'lm_congruence',
+           'lm_kron', 'lm_schur_complement']
+
+from numpy import zeros, asarray, kron
+from numpy.linalg import solve
+
+from .lm import _optional_import
+
+
+def _is_sparse(m):
+    return hasattr(m, 'toarray')
+
+
+def _nvars(lms):
+    """Helper function checking that numerical linear matrices share the
+    same number of variables, and returning it."""
+    nvars = set(len(coeffs) for coeffs, const in lms)
+    if len(nvars) != 1:
+        raise ValueError('linear matrices must have the same number of '
+                         'variables')
+    return nvars.pop()
+
+
+def _bmat(blocks, sparse, heights, widths):
+    """Helper function assembling a 2D list of matrices (None for zero
+    blocks) into a matrix, with the given block row heights and block
+    column widths."""
+    if sparse:
+        scipy_sparse = _optional_import('scipy.sparse')
+        blocks = [[scipy_sparse.csr_matrix((h, w)) if m is None else m
+                   for m, w in zip(row, widths)]
+                  for row, h in zip(blocks, heights)]
+        return scipy_sparse.bmat(blocks, format='csr')
+    out = zeros((sum(heights), sum(widths)))
+    i = 0
+    for row, h in zip(blocks, heights):
+        j = 0
+        for m, w in zip(row, widths):
+            if m is not None:
+                out[i:i+h, j:j+w] = m
+            j += w
+        i += h
+    return out
+
+
+def lm_transpose(lm):
+    """Transpose a numerical linear matrix."""
+    coeffs, const = lm
+    return [m.T for m in coeffs], const.T
+
+
+def lm_bmat(blocks):
+    """Assemble a numerical linear matrix from a 2D list of blocks.
+
+    Parameters
+    ----------
+    blocks: list of lists
+        Each block is a numerical linear matrix, a constant numerical
+        matrix (numpy array or scipy sparse matrix), or None for a zero
+        block. Each block row and block column must contain at least one
+        block which is not None, and at least one block must be a numerical
+        linear matrix (ValueError is raised otherwise). Symmetry is not
+        enforced (see lm_transpose for the blocks below the diagonal).
+
+    Returns
+    -------
+    lm: numerical linear matrix
+
+    Example
+    -------
+    >>> from numpy import array
+    >>> from lmi_sdp import lm_bmat
+    >>> P = ([array([[1.]])], array([[0.]]))
+    >>> coeffs, const = lm_bmat([[P, array([[2.]])], [array([[2.]]), P]])
+    >>> coeffs[0].tolist(), const.tolist()
+    ([[1.0, 0.0], [0.0, 1.0]], [[0.0, 2.0], [2.0, 0.0]])
+    """
+    lms = [b for row in blocks for b in row
+           if b is not None and not hasattr(b, 'shape')]
+    if not lms:
+        raise ValueError('at least one block must be a numerical linear '
+                         'matrix')
+    nvars = _nvars(lms)
+    consts = [b for row in blocks for b in row
+              if b is not None and hasattr(b, 'shape')]
+    sparse = any(_is_sparse(m) for m in consts) or \
+        any(_is_sparse(m) for coeffs, const in lms for m in coeffs + [const])
+
+    def _shape(b):
+        return b.shape if hasattr(b, 'shape') else b[1].shape
+
+    heights = [[_shape(b)[0] for b in row if b is not None][0]
+               for row in blocks]
+    widths = [[_shape(row[j])[1] for row in blocks if row[j] is not None][0]
+              for j in range(len(blocks[0]))]
+
+    def _part(b, k):
+        if b is None:
+            return None
+        if hasattr(b, 'shape'):  # constant block, zero coefficients
+            return b if k is None else None
+        return b[1] if k is None else b[0][k]
+
+    coeffs = [_bmat([[_part(b, k) for b in row] for row in blocks], sparse,
+                    heights, widths)
+              for k in range(nvars)]
+    const = _bmat([[_part(b, None) for b in row] for row in blocks], sparse,
+                  heights, widths)
+    return coeffs, const
+
+
+def lm_block_diag(lms):
+    """Join numerical linear matrices into a block diagonal one."""
+    lms = list(lms)
+    return lm_bmat([[lm if i == j else None for j in range(len(lms))]
+                    for i, lm in enumerate(lms)])
+
+
+def _congruence(m, T):
+    if _is_sparse(m) or _is_sparse(T):
+        scipy_sparse = _optional_import('scipy.sparse')
+        T = scipy_sparse.csr_matrix(T)
+        return T.T.dot(scipy_sparse.csr_matrix(m)).dot(T).tocsr()
+    return T.T.dot(m).dot(T)
+
+
+def lm_congruence(lm, T):
+    """Compute the congruence `T.T*F(x)*T` of a numerical linear matrix
+    F(x) by a numerical matrix T (numpy array or scipy sparse matrix)."""
+    coeffs, const = lm
+    if not _is_sparse(T):
+        T = asarray(T, dtype=float)
+    return [_congruence(m, T) for m in coeffs], _congruence(const, T)
+
+
+def _kron(a, b):
+    if _is_sparse(a) or _is_sparse(b):
+        return _optional_import('scipy.sparse').kron(a, b, format='csr')
+    return kron(a, b)
+
+
+def lm_kron(lm, A, left=False):
+    """Compute the Kronecker product `kron(F(x), A)` of a numerical linear
+    matrix F(x) and a constant numerical matrix A, or `kron(A, F(x))` if
+    left is True."""
+    coeffs, const = lm
+    if not _is_sparse(A):
+        A = asarray(A, dtype=float)
+    if left:
+        return [_kron(A, m) for m in coeffs], _kron(A, const)
+    return [_kron(m, A) for m in coeffs], _kron(const, A)
+
+
+def lm_schur_complement(lm, k):
+    """Eliminate the trailing block of a numerical linear matrix by a Schur
+    complement.
+
+    For `F(x) = [[A(x), B], [B.T, C]]`, where A(x) is k x k and B and C do
+    not depend on the variables, returns `A(x) - B*inv(C)*B.T`, which is
+    PSD if and only if F(x) is, provided that C is positive definite.
+
+    Raises ValueError if B or C depend on the variables.
+    """
+    coeffs, const = lm
+    for m in coeffs:
+        rows, cols = m.nonzero()
+        if ((rows >= k) | (cols >= k)).any():
+            raise ValueError('the off-diagonal and trailing blocks must not '
+                             'depend on the variables')
+
+    def _sub(m, rows, cols):
+        if _is_sparse(m):
+            return m.tocsr()[rows, :][:, cols]
+        return m[rows, cols]
+
+    n = const.shape[0]
+    head, tail = slice(0, k), slice(k, n)
+    B = _sub(const, head, tail)
+    C = _sub(const, tail, tail)
+    B = B.toarray() if _is_sparse(B) else B
+    C = C.toarray() if _is_sparse(C) else C
+    correction = B.dot(solve(C, B.T))
+    A0 = _sub(const, head, head)
+    if _is_sparse(A0):
+        correction = _optional_import('scipy.sparse').csr_matrix(correction)
+    return [_sub(m, head, head) for m in coeffs], A0 - correction
@@ -0,0 +1,253 @@
+"""Chordal sparsity decomposition of numerical LMIs"""
+
+__all__ = ['aggregate_sparsity', 'chordal_cliques', 'chordal_decomposition']
+
+from numpy import zeros, asarray, arange, concatenate, searchsorted, ix_
+
+from .lm import _optional_import, _nonzero_entries
+
+
+def _triplets(coeffs, const):
+    """Helper function returning the `(mats, rows, cols, values)` arrays of
+    the nonzero entries of a numerical LMI, where mats is 0 for the constant
+    term and k for the k-th variable."""
+    parts = []
+    for k, m in enumerate([const] + list(coeffs)):
+        rows, cols, vals = _nonzero_entries(m)
+        vals = asarray(vals, dtype=float)
+        nz = vals != 0
+        parts.append((zeros(nz.sum(), dtype=int) + k,
+                      asarray(rows, dtype=int)[nz],
+                      asarray(cols, dtype=int)[nz], vals[nz]))
+    return [concatenate(a) for a in zip(*parts)]
+
+
+def _pattern(n, rows, cols):
+    """Helper function building the symmetric n x n pattern of nonzero
+    triplets, with a True diagonal."""
+    pattern = zeros((n, n), dtype=bool)
+    pattern[rows, cols] = True
+    pattern |= pattern.T
+    pattern[range(n), range(n)] = True
+    return pattern
+
+
+def aggregate_sparsity(coeffs, const):
+    """Compute the aggregate sparsity pattern of a numerical LMI.
+
+    Parameters
+    ----------
+    coeffs: list of numpy arrays or scipy sparse matrices
+        Coefficient matrices of each variable.
+    const: numpy array or scipy sparse matrix
+        Zero order coefficients.
+
+    Returns
+    -------
+    pattern: numpy bool array
+        Symmetric pattern which is True wherever any coefficient matrix is
+        nonzero. The diagonal is always True.
+    """
+    mats, rows, cols, vals = _triplets(coeffs, const)
+    return _pattern(const.shape[0], rows, cols)
+
+
+def chordal_cliques(pattern):
+    """Find the maximal cliques of a chordal extension of a sparsity pattern.
+
+    The chordal extension is obtained by symbolic elimination using the
+    minimum degree ordering heuristic.
+
+    Parameters
+    ----------
+    pattern: square boolean array
+
+    Returns
+    -------
+    cliques: list of lists of ints
+        Sorted row/column indices of each maximal clique, in elimination
+        order.
+
+    Example
+    -------
+    >>> from numpy import array
+    >>> from lmi_sdp import chordal_cliques
+    >>> chordal_cliques(array([[1, 1, 0, 0],
+    ...                        [1, 1, 1, 0],
+    ...                        [0, 1, 1, 1],
+    ...                        [0, 0, 1, 1]]))
+    [[0, 1], [1, 2], [2, 3]]
+    """
+    n = pattern.shape[0]
+    adj = [set(pattern[i].nonzero()[0]) - set([i]) for i in range(n)]
+
+    remaining = set(range(n))
+    candidates = []
+    while remaining:
+        v = min(remaining, key=lambda u: (len(adj[u]), u))
+        neighbors = adj[v]
+        for u in neighbors:
+            adj[u] |= neighbors
+            adj[u].discard(u)
+            adj[u].discard(v)
+        candidates.append(neighbors | set([v]))
+        remaining.remove(v)
+
+    cliques = []
+    for idx, c in enumerate(candidates):
+        if not any(c < other or (c == other and j < idx)
+                   for j, other in enumerate(candidates) if j != idx):
+            cliques.append(sorted(c))
+    return cliques
+
+
+def _empty(size, sparse):
+    """Helper function creating a read-only size x size zero matrix."""
+    if sparse:
+        m = _optional_import('scipy.sparse').csr_matrix((size, size))
+        m.data.setflags(write=False)
+    else:
+        m = zeros((size, size))
+        m.setflags(write=False)
+    return m
+
+
+def _lmi_from_triplets(mats, rows, cols, vals, size, nvars, sparse):
+    """Helper function building a size x size numerical LMI with nvars
+    variables from its nonzero triplets (see _triplets).
+
+    Only the matrices with entries are built; all the others are the same
+    read-only zero matrix.
+    """
+    order = mats.argsort(kind='mergesort')
+    mats, rows, cols, vals = mats[order], rows[order], cols[order], \
+        vals[order]
+    bounds = searchsorted(mats, range(nvars + 2))
+    empty = _empty(size, sparse)
+    scipy_sparse = _optional_import('scipy.sparse') if sparse else None
+
+    result = []
+    for k in range(nvars + 1):
+        s, e = bounds[k], bounds[k + 1]
+        if s == e:
+            result.append(empty)
+        elif sparse:
+            result.append(scipy_sparse.csr_matrix(
+                (vals[s:e], (rows[s:e], cols[s:e])), shape=(size, size)))
+        else:
+            m = zeros((size, size))
+            m[rows[s:e], cols[s:e]] = vals[s:e]
+            result.append(m)
+    return result[1:], result[0]
+
+
+def _decompose_block(triplets, n, cliques):
+    """Helper function splitting the nonzero triplets of one numerical LMI
+    over its cliques.
+
+    Returns, for each clique, the triplets it owns, with rows and columns
+    numbered within the clique, and the list of couplings `(i, j, k0, k)`,
+    each standing for a new variable which moves entry (i, j) from clique
+    k0 into clique k.
+    """
+    owners = {}
+    for k, c in enumerate(cliques):
+        for a, i in enumerate(c):
+            for j in c[a:]:
+                owners.setdefault((i, j), []).append(k)
+
+    couplings = []
+    for (i, j) in sorted(owners):
+        ks = owners[(i, j)]
+        for k in ks[1:]:
+            couplings.append((i, j, ks[0], k))
+
+    # each entry belongs to the first clique containing it
+    owner = zeros((n, n), dtype=int)
+    for k in reversed(range(len(cliques))):
+        owner[ix_(cliques[k], cliques[k])] = k
+
+    mats, rows, cols, vals = triplets
+    entry_owner = owner[rows, cols]
+    order = entry_owner.argsort(kind='mergesort')
+    bounds = searchsorted(entry_owner[order], range(len(cliques) + 1))
+    pos = zeros(n, dtype=int)
+    blocks = []
+    for k, c in enumerate(cliques):
+        sel = order[bounds[k]:bounds[k + 1]]
+        pos[c] = arange(len(c))
+        blocks.append((mats[sel], pos[rows[sel]], pos[cols[sel]], vals[sel]))
+    return blocks, couplings
+
+
+def chordal_decomposition(lmi_coeffs):
+    """Decompose numerical LMIs into smaller clique-sized LMIs.
+
+    Each LMI `F(x) >= 0` whose aggregate sparsity pattern has a chordal
+    extension with more than one maximal clique is rewritten as one LMI per
+    clique, `S_k(x, u) >= 0`, such that `F(x)` is the sum of the `S_k`
+    embedded back in place (Agler's theorem). Entries shared by several
+    cliques are split among them by new coupling variables `u`, appended
+    after the original variables.
+
+    Parameters
+    ----------
+    lmi_coeffs: list of numerical LMIs, as returned by lmi_to_coeffs
+
+    Returns
+    -------
+    coeffs: list of numerical LMIs
+        The decomposed LMIs, w.r.t. the original variables followed by the
+        coupling variables. Coefficient matrices are built from the nonzero
+        entries owned by each clique (scipy.sparse.csr_matrix if the input
+        is sparse); those without entries are the same read-only zero
+        matrix.
+    n_coupling: int
+        Number of coupling variables added.
+    """
+    decomposed = []
+    couplings = []
+    nvars = 0
+    for coeffs, const in lmi_coeffs:
+        n = const.shape[0]
+        nvars = len(coeffs)
+        triplets = _triplets(coeffs, const)
+        cliques = chordal_cliques(_pattern(n, triplets[1], triplets[2]))
+        if len(cliques) <= 1:
+            decomposed.append(((coeffs, const), None, None, None))
+            continue
+        blocks, block_couplings = _decompose_block(triplets, n, cliques)
+        # couplings touching each clique, as (u, i, j, sign)
+        touching = [[] for c in cliques]
+        for u, (i, j, k0, k1) in enumerate(block_couplings, len(couplings)):
+            touching[k0].append((u, i, j, -1.0))
+            touching[k1].append((u, i, j, 1.0))
+        decomposed.append((blocks, cliques, touching,
+                           hasattr(const, 'toarray')))
+        couplings += block_couplings
+
+    n_coupling = len(couplings)
+    result = []
+    for blocks, cliques, touching, sparse in decomposed:
+        if cliques is None:
+            coeffs, const = blocks
+            empty = _empty(const.shape[0], hasattr(const, 'toarray'))
+            result.append((list(coeffs) + [empty] * n_coupling, const))
+            continue
+        for k, (mats, rows, cols, vals) in enumerate(blocks):
+            pos = dict((i, a) for a, i in enumerate(cliques[k]))
+            u_mats, u_rows, u_cols, u_vals = [], [], [], []
+            for u, i, j, sign in touching[k]:
+                for a, b in set([(pos[i], pos[j]), (pos[j], pos[i])]):
+                    u_mats.append(nvars + 1 + u)
+                    u_rows.append(a)
+                    u_cols.append(b)
+                    u_vals.append(sign)
+            result.append(_lmi_from_triplets(
+                concatenate([mats, asarray(u_mats, dtype=int)]),
+                concatenate([rows, asarray(u_rows, dtype=int)]),
+                concatenate([cols, asarray(u_cols, dtype=int)]),
+                concatenate([vals, asarray(u_vals, dtype=float)]),
+                len(cliques[k]), nvars + n_coupling, sparse))
+
+    return result, n_coupling
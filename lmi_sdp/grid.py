@@ -0,0 +1,213 @@
+"""Numerical LMIs of parametrized LMI families over parameter grids"""
+
+__all__ = ['GridCoeffs', 'lmi_grid_coeffs']
+
+from numpy import array, asarray, zeros, ones, unique, add as np_add
+
+from .lm import _optional_import, _sym_entries, NonLinearMatrixError
+from .sdp import NotAvailableError, _iter_slms, objective_to_coeffs, \
+    _cvxopt_from_coeffs, _sdpa_sparse_from_coeffs
+
+_nonpoly_msg = "entries must be linear w.r.t. 'variables' and polynomial " \
+    "w.r.t. 'parameters'"
+
+
+class GridCoeffs(object):
+    """Numerical LMIs of an LMI family at each point of a parameter grid,
+    as returned by lmi_grid_coeffs.
+
+    For each block b of the family, the values of its nonzero coefficients
+    at all points are stored stacked in the (npoints x nkeys) array
+    `values[b]`, where column c is entry `(rows[b][c], cols[b][c])` of
+    coefficient matrix `mats[b][c]` (0 for constants, k for the k-th
+    variable).
+
+    Attributes
+    ----------
+    points: (npoints x nparams) numpy array
+    nvars: int
+    block_sizes: list of ints
+    lmi_index: list of ints
+        Index of the LMI of the family each block comes from.
+    mats, rows, cols, values: lists of numpy arrays, one per block
+    """
+
+    def __init__(self, points, nvars, block_sizes, lmi_index, mats, rows,
+                 cols, values):
+        self.points = points
+        self.nvars = nvars
+        self.block_sizes = block_sizes
+        self.lmi_index = lmi_index
+        self.mats = mats
+        self.rows = rows
+        self.cols = cols
+        self.values = values
+
+    def __len__(self):
+        return len(self.points)
+
+    def _block(self, t, b, sparse):
+        """Numerical LMI of block b at point t."""
+        n = self.block_sizes[b]
+        nmats = self.nvars + 1
+        if sparse:
+            scipy_sparse = _optional_import('scipy.sparse')
+            stacked = scipy_sparse.coo_matrix(
+                (self.values[b][t],
+                 (self.mats[b] * n + self.rows[b], self.cols[b])),
+                shape=(nmats * n, n)).tocsr()
+            mats = [stacked[k*n:(k+1)*n] for k in range(nmats)]
+        else:
+            stacked = zeros((nmats, n, n))
+            stacked[self.mats[b], self.rows[b], self.cols[b]] = \
+                self.values[b][t]
+            mats = list(stacked)
+        return mats[1:], mats[0]
+
+    def lmi_coeffs(self, point=None, sparse=False):
+        """Return the numerical LMIs (see lmi_to_coeffs) at the point of
+        index `point` or, if None, at all points, point after point, i.e.,
+        the LMIs of the combined problem.
+
+        If sparse is True, scipy.sparse.csr_matrix matrices are used.
+        """
+        points = range(len(self)) if point is None else [point]
+        return [self._block(t, b, sparse) for t in points
+                for b in range(len(self.block_sizes))]
+
+    def to_cvxopt(self, objective_func, variables, objective_type='minimize',
+                  linear_cone=False):
+        """Prepare the combined problem, with the LMIs at all points, to be
+        used with cvxopt SDP solver (see to_cvxopt)."""
+        if _optional_import('cvxopt') is None:
+            raise NotAvailableError(self.to_cvxopt.__name__)
+        obj_coeffs = objective_to_coeffs(objective_func, variables,
+                                         objective_type)
+        return _cvxopt_from_coeffs(obj_coeffs, self.lmi_coeffs(), None,
+                                   linear_cone=linear_cone)
+
+    def to_sdpa_sparse(self, objective_func, variables,
+                       objective_type='minimize', comment=None,
+                       linear_cone=False, file=None):
+        """Put the combined problem, with the LMIs at all points, into SDPA
+        sparse format (see to_sdpa_sparse)."""
+        sparse = _optional_import('scipy.sparse') is not None
+        obj_coeffs = objective_to_coeffs(objective_func, variables,
+                                         objective_type)
+        return _sdpa_sparse_from_coeffs(
+            obj_coeffs, self.lmi_coeffs(sparse=sparse), None,
+            comment=comment, linear_cone=linear_cone, file=file)
+
+
+def lmi_grid_coeffs(lmis, variables, parameters, points, split_blocks=False):
+    """Transform a family of LMIs depending on parameters to numerical LMIs
+    at each point of a grid of parameter values.
+
+    Entries must be linear w.r.t. variables and polynomial w.r.t.
+    parameters. Each entry is converted only once, into SymPy's sparse
+    polynomial ring in both, and then all parameter monomials are evaluated
+    at all points at once, so that the cost of the symbolic work does not
+    grow with the number of points.
+
+    Parameters
+    ----------
+    lmis: symbolic LMI or Matrix, or a list of them
+    variables: list of symbols
+    parameters: list of symbols
+    points: array_like
+        (npoints x nparams) parameter values (or a vector if there is a
+        single parameter).
+    split_blocks: bool or string
+        See lmi_to_coeffs.
+
+    Returns
+    -------
+    grid: GridCoeffs
+        Use its lmi_coeffs method to get the numerical LMIs, and its
+        to_cvxopt and to_sdpa_sparse methods to export the combined problem
+        with the LMIs at all points.
+
+    Example
+    -------
+    >>> from sympy import Matrix, symbols
+    >>> from lmi_sdp import LMI_PSD, lmi_grid_coeffs
+    >>> x, p = symbols('x p')
+    >>> grid = lmi_grid_coeffs(LMI_PSD(Matrix([[p*x + p**2]])), [x], [p],
+    ...                        [1., 2., 3.])
+    >>> [(coeffs[0].tolist(), const.tolist())
+    ...  for coeffs, const in grid.lmi_coeffs()]
+    [([[1.0]], [[1.0]]), ([[2.0]], [[4.0]]), ([[3.0]], [[9.0]])]
+    """
+    from sympy.polys.rings import ring
+    from sympy.polys.domains import RR
+
+    variables = list(variables)
+    parameters = list(parameters)
+    if set(variables) & set(parameters):
+        raise ValueError('parameters must not be variables')
+    points = asarray(points, dtype=float)
+    if points.ndim == 1:
+        points = points.reshape(-1, 1)
+    if points.shape[1] != len(parameters):
+        raise ValueError('points must have one column per parameter')
+
+    nvars = len(variables)
+    R = ring(variables + parameters, RR)[0]
+    var_index = {(0,) * nvars: 0}
+    for k in range(nvars):
+        var_index[tuple(int(i == k) for i in range(nvars))] = k + 1
+
+    # terms (key, parameter monomial, coefficient) of each block, where key
+    # is the linear index of entry (i, j) of matrix k in the (nvars+1, n, n)
+    # stack of the block
+    block_sizes = []
+    lmi_index = []
+    terms = []
+    monomials = {}
+    for idx, slm in _iter_slms(lmis, split_blocks):
+        n = slm.rows
+        block_terms = []
+        for (i, j), expr in _sym_entries(slm):
+            try:
+                poly = R.from_expr(expr)
+            except (ValueError, KeyError):
+                raise NonLinearMatrixError(_nonpoly_msg)
+            for monom, coeff in poly.items():
+                k = var_index.get(monom[:nvars])
+                if k is None:
+                    raise NonLinearMatrixError(_nonpoly_msg)
+                mono = monomials.setdefault(monom[nvars:], len(monomials))
+                block_terms.append(((k * n + i) * n + j, mono, float(coeff)))
+        block_sizes.append(n)
+        lmi_index.append(idx)
+        terms.append(block_terms)
+
+    # parameter monomials at all points
+    exponents = zeros((len(monomials), len(parameters)), dtype=int)
+    for monom, m in monomials.items():
+        exponents[m] = monom
+    powers = ones((len(points), len(monomials)))
+    for j in range(len(parameters)):
+        powers *= points[:, [j]] ** exponents[:, j]
+
+    mats, rows, cols, values = [], [], [], []
+    for n, block_terms in zip(block_sizes, terms):
+        if block_terms:
+            keys, monos, coeffs = [array(a) for a in zip(*block_terms)]
+        else:
+            keys = monos = zeros(0, dtype=int)
+            coeffs = zeros(0)
+        order = keys.argsort(kind='mergesort')
+        keys, monos, coeffs = keys[order], monos[order], coeffs[order]
+        unique_keys, starts = unique(keys, return_index=True)
+        stacked = powers[:, monos] * coeffs
+        if len(unique_keys):
+            values.append(np_add.reduceat(stacked, starts, axis=1))
+        else:
+            values.append(zeros((len(points), 0)))
+        mats.append(unique_keys // (n * n))
+        rows.append(unique_keys // n % n)
+        cols.append(unique_keys % n)
+
+    return GridCoeffs(points, nvars, block_sizes, lmi_index, mats, rows,
+                      cols, values)
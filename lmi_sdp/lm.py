@@ -1,19 +1,31 @@
 """Tools for symbolic and numerical representations of linear matrices"""
-from sympy import ImmutableMatrix, S, Dummy, MatMul, MatAdd
+import sys
+from importlib import import_module
+
+from sympy import ImmutableMatrix, ImmutableSparseMatrix, S, Dummy, Add, \
+    MatMul, MatAdd
 from sympy.matrices.matrices import MatrixError
-from numpy import zeros
+from numpy import zeros, asarray, unique
+
+
+_optional_modules = {}
+
+
+def _optional_import(name):
+    """Import an optional dependency (e.g. 'scipy.sparse' or 'cvxopt') on
+    first use, returning None if it is not installed."""
+    if name not in _optional_modules:
+        try:
+            _optional_modules[name] = import_module(name)
+        except ImportError:  # pragma: no cover
+            _optional_modules[name] = None
+    return _optional_modules[name]
 
-try:
-    import scipy
-except ImportError:
-    scipy = None
-else:
-    import scipy.sparse
 
-try:
-    import cvxopt
-except ImportError:
-    cvxopt = None
+def _is_cvxopt_spmatrix(m):
+    """Check for a cvxopt sparse matrix without importing cvxopt."""
+    cvxopt = sys.modules.get('cvxopt')
+    return cvxopt is not None and isinstance(m, cvxopt.spmatrix)
 
 
 class NonLinearExpressionError(ValueError):
@@ -24,6 +36,30 @@ class NonLinearMatrixError(ValueError, MatrixError):
     pass
 
 
+def _lin_expr_coeff_dict(linear_expr, variables_set):
+    """Helper function returning the {term: coefficient} dict of a
+    symbolic expression linear w.r.t. the variables in variables_set, where
+    term is a variable or S.One (for the constant term)."""
+    dummy = Dummy()
+
+    def _is_linear(coeff_dict):
+        return all(k in variables_set or k is S.One or k == dummy
+                   for k in coeff_dict)
+
+    expr = dummy + linear_expr  # fixes as_coefficients_dict() behavior for
+                                # single term expressions
+    coeff_dict = expr.as_coefficients_dict()
+    if not _is_linear(coeff_dict):
+        expr = expr.expand()  # try expanding
+        coeff_dict = expr.as_coefficients_dict()
+        if not _is_linear(coeff_dict):
+                raise NonLinearExpressionError(
+                    "'linear_expr' must be linear w.r.t. 'variables'")
+    coeff_dict = dict(coeff_dict)
+    del coeff_dict[dummy]
+    return coeff_dict
+
+
 def lin_expr_coeffs(linear_expr, variables):
     """Convert a symbolic expression linear w.r.t. variables into a list of
     numerical coefficient
@@ -36,23 +72,151 @@ def lin_expr_coeffs(linear_expr, variables):
     consts: float
         The constant term (zero order coefficient).
     """
-    dummy = Dummy()
-    ok_set = set(variables) | set([S.One, dummy])
-    expr = dummy + linear_expr  # fixes as_coefficients_dict() behavior for
-                                # single term expressions
-    coeff_dict = expr.as_coefficients_dict()
-    if not set(coeff_dict.keys()).issubset(ok_set):
-        expr = expr.expand()  # try expanding
-        coeff_dict = expr.as_coefficients_dict()
-        if not set(coeff_dict.keys()).issubset(ok_set):
-                raise NonLinearExpressionError(
-                    "'linear_expr' must be linear w.r.t. 'variables'")
+    coeff_dict = _lin_expr_coeff_dict(linear_expr, set(variables))
     const = float(coeff_dict.get(S.One, 0))
     coeffs = [float(coeff_dict.get(x, 0)) for x in variables]
     return coeffs, const
 
 
-def lm_sym_to_coeffs(linear_matrix, variables, sparse=False):
+def iter_lm_triplets(linear_matrix, variables, upper=False):
+    """Iterate over the nonzero numerical coefficients of a symbolic matrix
+    linear w.r.t. variables, without building any coefficient matrix.
+
+    Parameters
+    ----------
+    linear_matrix: symbolic linear matrix
+    variables: list of symbols
+    upper: bool
+        If set to True, only the upper triangle (j >= i) is visited.
+
+    Yields
+    ------
+    (k, i, j, value): tuple
+        Coefficient `value` at entry (i, j) of the matrix multiplying the
+        k-th variable, where k=0 stands for the constant term and k=1 for the
+        first variable (the SDPA numbering).
+    """
+    lm = linear_matrix
+    index = dict((x, k+1) for k, x in enumerate(variables))
+    index[S.One] = 0
+    for i in range(lm.rows):
+        for j in range(i if upper else 0, lm.cols):
+            if lm[i, j] == 0:
+                continue
+            try:
+                coeff_dict = _lin_expr_coeff_dict(lm[i, j], index)
+            except NonLinearExpressionError:
+                raise NonLinearMatrixError(
+                    "'linear_matrix' must be composed of linear "
+                    "expressions w.r.t. 'variables'")
+            for term, coeff in coeff_dict.items():
+                if coeff != 0:
+                    yield index[term], i, j, float(coeff)
+
+
+def _sym_entries(linear_matrix):
+    """Helper function yielding `((i, j), expr)` for the nonzero entries of a
+    symbolic matrix (or matrix expression).
+
+    Sparse matrices are visited through their stored entries; todok is not
+    used since it is missing from older SymPy versions.
+    """
+    lm = linear_matrix
+    if not hasattr(lm, 'row_list') and hasattr(lm, 'as_explicit'):
+        lm = lm.as_explicit()
+    if hasattr(lm, 'row_list'):
+        entries = (((i, j), expr) for i, j, expr in lm.row_list())
+    else:
+        entries = (((i, j), lm[i, j])
+                   for i in range(lm.rows) for j in range(lm.cols))
+    for ij, expr in entries:
+        if expr != 0:
+            yield ij, expr
+
+
+def _poly_triplets(linear_matrices, variables):
+    """Helper function extracting all nonzero coefficients of a list of
+    symbolic matrices at once, by converting all their entries together
+    into sparse polynomial dicts in the variables.
+
+    Returns, for each matrix, the lists of k, i, j and value of its triplets
+    (see iter_lm_triplets).
+    """
+    from sympy.polys.polyutils import parallel_dict_from_expr
+    from sympy.polys.polyerrors import PolynomialError
+
+    entries = [(b, ij, expr) for b, lm in enumerate(linear_matrices)
+               for ij, expr in _sym_entries(lm)]
+    triplets = [([], [], [], []) for lm in linear_matrices]
+    if not entries:
+        return triplets
+    exprs = [expr for b, ij, expr in entries]
+    try:
+        try:  # entries which are already sums of terms need no expansion
+            dicts = parallel_dict_from_expr(exprs, gens=variables,
+                                            expand=False)[0]
+        except PolynomialError:
+            dicts = parallel_dict_from_expr(exprs, gens=variables)[0]
+        for (b, (i, j), expr), terms in zip(entries, dicts):
+            ks, rows, cols, vals = triplets[b]
+            for monom, coeff in terms.items():
+                degree = sum(monom)
+                if degree > 1:
+                    raise ValueError
+                ks.append(monom.index(1) + 1 if degree else 0)
+                rows.append(i)
+                cols.append(j)
+                vals.append(float(coeff))
+    except (PolynomialError, ValueError, TypeError):
+        raise NonLinearMatrixError(
+            "'linear_matrix' must be composed of linear "
+            "expressions w.r.t. 'variables'")
+    return triplets
+
+
+def _poly_lms_to_coeffs(linear_matrices, variables, sparse):
+    """Helper function implementing the 'poly' backend of
+    lm_sym_to_coeffs for a list of matrices, converting all of them with a
+    single polynomial conversion and building each coefficient matrix at
+    once."""
+    scipy_sparse = _optional_import('scipy.sparse') if sparse is True \
+        else None
+    cvxopt = _optional_import('cvxopt') if sparse == 'cvxopt' else None
+
+    lms_coeffs = []
+    for lm, triplets in zip(linear_matrices,
+                            _poly_triplets(linear_matrices, variables)):
+        ks, rows, cols = [asarray(a, dtype=int) for a in triplets[:3]]
+        vals = asarray(triplets[3], dtype=float)
+        shape = (lm.rows, lm.cols)
+        if not (scipy_sparse or cvxopt):
+            stacked = zeros((len(variables) + 1,) + shape)
+            stacked[ks, rows, cols] = vals
+            lms_coeffs.append((list(stacked[1:]), stacked[0]))
+            continue
+        if scipy_sparse:
+            mats = [scipy_sparse.lil_matrix(shape)
+                    for k in range(len(variables) + 1)]
+            for k, i, j, val in zip(*triplets):
+                mats[k][i, j] = val
+        else:
+            mats = [cvxopt.spmatrix([], [], [], shape)
+                    for k in range(len(variables) + 1)]
+            order = ks.argsort(kind='mergesort')
+            ks, rows, cols, vals = \
+                ks[order], rows[order], cols[order], vals[order]
+            nonzero_ks, starts = unique(ks, return_index=True)
+            for k, start, stop in zip(nonzero_ks, starts,
+                                      list(starts[1:]) + [len(ks)]):
+                mats[k] = cvxopt.spmatrix(vals[start:stop].tolist(),
+                                          rows[start:stop].tolist(),
+                                          cols[start:stop].tolist(), shape)
+        lms_coeffs.append((mats[1:], mats[0]))
+    return lms_coeffs
+
+
+def lm_sym_to_coeffs(linear_matrix, variables, sparse=False,
+                     backend='expr'):
     """Convert a symbolic matrix linear w.r.t. variables into a list of
     numerical coefficient matrices
 
@@ -65,6 +229,14 @@ def lm_sym_to_coeffs(linear_matrix, variables, sparse=False):
         (the default) numpy.matrix dense matrices are used. If set to True,
         scipy.sparse.lil_matrix sparse matrices are used. If set to 'cvxopt',
         cvxopt.sparse.spmatrix sparse matrices are used.
+    backend: 'expr' or 'poly'
+        With 'expr' (the default), the coefficients of each entry are read
+        from its expression (expanding it if needed). With 'poly', all
+        entries are converted together into sparse polynomials in the
+        variables, which avoids expanding entries that are already sums of
+        terms, and each coefficient matrix is built at once; nonlinear
+        entries are detected from the monomial degrees. Entries must then
+        have numerical coefficients.
 
     Returns
     -------
@@ -76,11 +248,20 @@ def lm_sym_to_coeffs(linear_matrix, variables, sparse=False):
         Matrix containing the constant terms (zero order coefficients).
     """
 
+    if backend == 'poly':
+        return _poly_lms_to_coeffs([linear_matrix], variables, sparse)[0]
+    elif backend != 'expr':
+        raise ValueError("backend must be 'expr' or 'poly'")
+
     lm = linear_matrix
 
-    if scipy and sparse is True:
-        consts = scipy.sparse.lil_matrix((lm.rows, lm.cols))
-        coeffs = [scipy.sparse.lil_matrix((lm.rows, lm.cols))
+    scipy_sparse = _optional_import('scipy.sparse') if sparse is True \
+        else None
+    cvxopt = _optional_import('cvxopt') if sparse == 'cvxopt' else None
+
+    if scipy_sparse and sparse is True:
+        consts = scipy_sparse.lil_matrix((lm.rows, lm.cols))
+        coeffs = [scipy_sparse.lil_matrix((lm.rows, lm.cols))
                   for i in range(len(variables))]
     elif cvxopt and sparse == 'cvxopt':
         consts = cvxopt.spmatrix([], [], [], (lm.rows, lm.cols))
@@ -100,30 +281,96 @@ def lm_sym_to_coeffs(linear_matrix, variables, sparse=False):
                     "'linear_matrix' must be composed of linear "
                     "expressions w.r.t. 'variables'")
             for i in range(len(variables)):
-                coeffs[i][elem] = coeffs_elem[i]
+                if coeffs_elem[i] != 0:
+                    coeffs[i][elem] = coeffs_elem[i]
     return coeffs, consts
 
 
-def lm_coeffs_to_sym(coeffs, variables):
+def _shape(m):
+    """Helper function returning the shape of a numerical matrix."""
+    if _is_cvxopt_spmatrix(m):
+        return m.size
+    return m.shape
+
+
+def _nonzero_entries(m):
+    """Helper function returning the (rows, cols, values) nonzero triplets of
+    a dense or sparse numerical matrix."""
+    if hasattr(m, 'tocoo'):
+        m = m.tocoo()
+        return m.row, m.col, m.data
+    if _is_cvxopt_spmatrix(m):
+        return list(m.I), list(m.J), list(m.V)
+    m = asarray(m)
+    rows, cols = m.nonzero()
+    return rows, cols, m[rows, cols]
+
+
+def lm_coeffs_to_sym(coeffs, variables, sparse=False):
     """Create a symbolic matrix linear w.r.t. variables given a list of
-    numerical coefficient matrices"""
-    lm = ImmutableMatrix(coeffs[1])
-    for i, x in enumerate(variables):
-        lm += x*ImmutableMatrix(coeffs[0][i])
+    numerical coefficient matrices
 
-    return lm
+    Coefficient matrices may be dense (numpy) or sparse (scipy.sparse or
+    cvxopt.spmatrix); only their nonzero entries are visited and each matrix
+    entry is built at once as a sum of terms.
 
+    Parameters
+    ----------
+    coeffs: pair of list of numerical matrices and numerical matrix
+        Coefficients of each variable and zero order coefficients, as
+        returned by lm_sym_to_coeffs.
+    variables: list of symbols
+    sparse: bool
+        If set to True an ImmutableSparseMatrix is returned, otherwise
+        (the default) an ImmutableMatrix is returned.
+    """
+    rows, cols = _shape(coeffs[1])
+    terms = {}
+    for i, j, v in zip(*_nonzero_entries(coeffs[1])):
+        terms.setdefault((int(i), int(j)), []).append(S(float(v)))
+    for x, m in zip(variables, coeffs[0]):
+        for i, j, v in zip(*_nonzero_entries(m)):
+            terms.setdefault((int(i), int(j)), []).append(S(float(v))*x)
+
+    entries = dict((elem, Add(*elem_terms))
+                   for elem, elem_terms in terms.items())
+    if sparse:
+        return ImmutableSparseMatrix(rows, cols, entries)
+    return ImmutableMatrix(rows, cols,
+                           lambda i, j: entries.get((i, j), S.Zero))
 
-def lm_sym_expanded(linear_matrix, variables):
+
+def lm_sym_expanded(linear_matrix, variables, sparse=False):
     """Return matrix in the form of sum of coefficent matrices times varibles.
+
+    Variables whose coefficient matrix is all zeros are left out. If sparse
+    is True, coefficient matrices are ImmutableSparseMatrix.
     """
     if S(linear_matrix).free_symbols & set(variables):
-        coeffs, const = lm_sym_to_coeffs(linear_matrix, variables)
+        has_scipy = _optional_import('scipy.sparse') is not None
+        coeffs, const = lm_sym_to_coeffs(linear_matrix, variables,
+                                         sparse=has_scipy)
+        shape = _shape(const)
+
+        def _to_sym(m, entries):
+            if sparse:
+                return ImmutableSparseMatrix(
+                    shape[0], shape[1],
+                    dict(((int(i), int(j)), float(v))
+                         for i, j, v in zip(*entries)))
+            return ImmutableMatrix(m.toarray() if hasattr(m, 'toarray')
+                                   else m)
+
         terms = []
         for i, v in enumerate(variables):
-            terms.append(MatMul(ImmutableMatrix(coeffs[i]), v))
-        if const.any():
-            terms.append(ImmutableMatrix(const))
+            entries = _nonzero_entries(coeffs[i])
+            if len(entries[0]):
+                terms.append(MatMul(_to_sym(coeffs[i], entries), v))
+        entries = _nonzero_entries(const)
+        if len(entries[0]):
+            terms.append(_to_sym(const, entries))
+        if not terms:
+            return _to_sym(const, entries)
         return MatAdd(*terms)
     else:
         return linear_matrix
@@ -1,5 +1,7 @@
 """LMI representation and tools"""
 
+import re as _re
+
 import sympy
 from sympy import sympify, GreaterThan, StrictGreaterThan, LessThan, \
     StrictLessThan, MatrixExpr, block_collapse
@@ -8,7 +10,12 @@ from sympy.matrices.matrices import MatrixError, ShapeError
 
 from .lm import lm_sym_expanded
 
-from packaging import version
+
+def _version_tuple(version):
+    """Helper function turning a version string as '1.5.1' or '1.13.0rc2'
+    into a comparable tuple of its leading integers, as (1, 5, 1)."""
+    return tuple(int(n) for n in
+                 _re.match(r'\d+(\.\d+)*', version).group().split('.'))
 
 
 class NonSymmetricMatrixError(ValueError, MatrixError):
@@ -20,7 +27,8 @@ class BaseLMI(object):
 
     BaseLMI is used so that LMI_* classes can share functions.
     """
-    _options = dict(evaluate=False) if version.parse(sympy.__version__) >= version.parse("0.7.6") else dict()
+    _options = dict(evaluate=False) \
+        if _version_tuple(sympy.__version__) >= (0, 7, 6) else dict()
 
     def __new__(cls, lhs, rhs, rel_cls, assert_symmetry=True):
         lhs = sympify(lhs)
@@ -64,15 +72,17 @@ class BaseLMI(object):
         else:
             return LMI_PSD(diff, 0)
 
-    def expanded(self, variables):
+    def expanded(self, variables, sparse=False):
         """Return the LMI as a sum of coefficent matrices times varibles form.
+
+        See lm_sym_expanded.
         """
         if self.lhs.is_Matrix:
-            lhs = lm_sym_expanded(self.lhs, variables)
+            lhs = lm_sym_expanded(self.lhs, variables, sparse)
         else:
             lhs = self.lhs
         if self.rhs.is_Matrix:
-            rhs = lm_sym_expanded(self.rhs, variables)
+            rhs = lm_sym_expanded(self.rhs, variables, sparse)
         else:
             rhs = self.rhs
         return self.func(lhs, rhs)
@@ -0,0 +1,124 @@
+"""Low-rank factorization of numerical LMI coefficients"""
+
+__all__ = ['low_rank_factor', 'low_rank_coeffs']
+
+from numpy import zeros, asarray, bincount, argmax, column_stack, abs as np_abs
+from numpy.linalg import eigh, norm
+
+from .lm import _optional_import, _is_cvxopt_spmatrix, _shape, \
+    _nonzero_entries
+
+
+def _as_matrix(m, rows, cols, vals, shape):
+    """Helper function converting m to a numpy array or a scipy csc matrix,
+    the types supporting column extraction and products with vectors."""
+    if hasattr(m, 'toarray'):
+        return m.tocsc()
+    if _is_cvxopt_spmatrix(m):
+        scipy_sparse = _optional_import('scipy.sparse')
+        if scipy_sparse is not None:
+            return scipy_sparse.csc_matrix((vals, (rows, cols)), shape=shape)
+        dense = zeros(shape)
+        dense[rows, cols] = vals
+        return dense
+    return asarray(m, dtype=float)
+
+
+def _column(m, j):
+    """Helper function extracting column j of m as a dense vector."""
+    if hasattr(m, 'toarray'):
+        return m[:, j].toarray().ravel()
+    return m[:, j].copy()
+
+
+def low_rank_factor(m, max_rank=2, tol=1e-9):
+    """Factor a symmetric matrix of low rank as `m = U*diag(d)*U.T`.
+
+    The column space of m is found by pivoted Gram-Schmidt on its columns,
+    stopping as soon as the remaining columns vanish or more than max_rank
+    columns are needed; only single columns and products of m with vectors
+    are used, so sparse matrices are never densified. The small projected
+    matrix is then diagonalized.
+
+    Parameters
+    ----------
+    m: numpy array, scipy sparse matrix or cvxopt spmatrix
+    max_rank: int
+    tol: float
+        Relative tolerance on column norms and eigenvalues.
+
+    Returns
+    -------
+    (U, d): tuple of numpy arrays, or None
+        U is n x r and d has r elements, where r <= max_rank is the
+        numerical rank of m. None is returned if the rank is larger than
+        max_rank.
+
+    Example
+    -------
+    >>> from numpy import array
+    >>> from lmi_sdp import low_rank_factor
+    >>> U, d = low_rank_factor(array([[1., 2.], [2., 4.]]))
+    >>> d.round(6).tolist()
+    [5.0]
+    >>> (U.dot(U.T) * d[0]).round(6).tolist()
+    [[1.0, 2.0], [2.0, 4.0]]
+    """
+    shape = _shape(m)
+    rows, cols, vals = _nonzero_entries(m)
+    rows = asarray(rows, dtype=int)
+    cols = asarray(cols, dtype=int)
+    vals = asarray(vals, dtype=float)
+    resid = bincount(cols, vals**2, minlength=shape[1])
+    if not len(vals) or resid.max() == 0:
+        return zeros((shape[0], 0)), zeros(0)
+    threshold = tol**2 * resid.max()
+    m = _as_matrix(m, rows, cols, vals, shape)
+
+    Q = []
+    MQ = []
+    while True:
+        # resid estimates the squared norm of the part of each column out of
+        # span(Q); the pivot column is projected out explicitly
+        j = argmax(resid)
+        v = _column(m, j)
+        for i in range(2):  # reorthogonalize once
+            for q in Q:
+                v -= q.dot(v) * q
+        if v.dot(v) <= threshold:
+            break
+        if len(Q) == max_rank:
+            return None
+        q = v / norm(v)
+        Q.append(q)
+        MQ.append(m.dot(q))
+        resid -= MQ[-1]**2
+        resid[j] = 0.
+
+    Q = column_stack(Q)
+    C = Q.T.dot(column_stack(MQ))
+    w, V = eigh((C + C.T) / 2)
+    keep = np_abs(w) > tol * np_abs(w).max()
+    return Q.dot(V[:, keep]), w[keep]
+
+
+def low_rank_coeffs(lmi_coeffs, max_rank=2, tol=1e-9):
+    """Factor the coefficient matrices of numerical LMIs which have low
+    rank (see low_rank_factor).
+
+    Parameters
+    ----------
+    lmi_coeffs: list of numerical LMIs, as returned by lmi_to_coeffs
+    max_rank: int
+    tol: float
+
+    Returns
+    -------
+    factors: list
+        For each numerical LMI, a pair with the list of the `(U, d)` factors
+        of each variable coefficient matrix and the factors of the constant
+        matrix, with None wherever the rank is larger than max_rank.
+    """
+    return [([low_rank_factor(m, max_rank, tol) for m in coeffs],
+             low_rank_factor(const, max_rank, tol))
+            for coeffs, const in lmi_coeffs]
@@ -0,0 +1,162 @@
+"""Numerical linear operators of LMIs for use in custom SDP solvers"""
+
+__all__ = ['svec', 'smat', 'LMIOperator']
+
+from numpy import array, asarray, zeros, empty, sqrt, where, triu_indices, \
+    unique, searchsorted, concatenate
+
+from .lm import _optional_import
+
+
+def _svec_index(n):
+    """Helper function returning the upper triangle indices of an n x n
+    matrix, in svec order, and the corresponding svec scaling factors."""
+    rows, cols = triu_indices(n)
+    return rows, cols, where(rows == cols, 1., sqrt(2.))
+
+
+def svec(m):
+    """Stack the upper triangle of a symmetric matrix into a vector, with the
+    off-diagonal elements scaled by sqrt(2), so that
+    `trace(A*B) == svec(A).dot(svec(B))`.
+
+    Example
+    -------
+    >>> from numpy import array
+    >>> from lmi_sdp import svec
+    >>> svec(array([[1., 2.], [2., 3.]])).round(4).tolist()
+    [1.0, 2.8284, 3.0]
+    """
+    m = asarray(m.toarray() if hasattr(m, 'toarray') else m, dtype=float)
+    rows, cols, scale = _svec_index(m.shape[0])
+    return m[rows, cols] * scale
+
+
+def smat(v, n):
+    """Inverse of svec: rebuild the n x n symmetric matrix."""
+    rows, cols, scale = _svec_index(n)
+    m = zeros((n, n))
+    m[rows, cols] = asarray(v) / scale
+    m[cols, rows] = m[rows, cols]
+    return m
+
+
+class LMIOperator(object):
+    """Linear operator of numerical LMIs `F(x) = F0 + sum_i x_i*F_i >= 0`.
+
+    Built once from the output of lmi_to_coeffs (dense or sparse), it
+    precomputes, for each block, the sparse matrix whose columns are the
+    svec's of the F_i, and the aggregate sparsity pattern of the F_i, which
+    are then used by:
+
+    - apply(X): the map `A(X) = [trace(F_i*X)]_i`;
+    - adjoint(y): its adjoint `A*(y) = sum_i y_i*F_i`;
+    - schur(S, T): the Schur complement matrix
+      `M_ij = trace(F_i*S*F_j*T)`, with T defaulting to S.
+
+    Matrix arguments and results are lists with one matrix per block.
+    Requires scipy.
+
+    Parameters
+    ----------
+    lmi_coeffs: list of numerical LMIs, as returned by lmi_to_coeffs
+    """
+
+    def __init__(self, lmi_coeffs):
+        scipy_sparse = _optional_import('scipy.sparse')
+        if scipy_sparse is None:
+            raise ImportError('LMIOperator requires scipy')
+        lmi_coeffs = list(lmi_coeffs)
+        self.nvars = len(lmi_coeffs[0][0]) if lmi_coeffs else 0
+        self.block_sizes = []
+        self.const = []
+        self._svec = []
+        self._blocks = []
+        for coeffs, const in lmi_coeffs:
+            n = const.shape[0]
+            self.block_sizes.append(n)
+            self.const.append(const.toarray() if hasattr(const, 'toarray')
+                              else asarray(const, dtype=float))
+            self._svec.append(self._svec_matrix(coeffs, n, scipy_sparse))
+            self._blocks.append(self._pattern(coeffs, n, scipy_sparse))
+
+    def _svec_matrix(self, coeffs, n, scipy_sparse):
+        """Sparse matrix whose k-th column is svec(F_k)."""
+        rows, cols, data = [], [], []
+        for k, m in enumerate(coeffs):
+            m = scipy_sparse.coo_matrix(m)
+            upper = m.row <= m.col
+            r, c = m.row[upper], m.col[upper]
+            rows.append(r * n - r * (r - 1) // 2 + (c - r))
+            cols.append(zeros(len(r), dtype=int) + k)
+            data.append(m.data[upper] * where(r == c, 1., sqrt(2.)))
+        p = n * (n + 1) // 2
+        if not rows:
+            return scipy_sparse.csc_matrix((p, 0))
+        return scipy_sparse.csc_matrix(
+            (concatenate(data), (concatenate(rows), concatenate(cols))),
+            shape=(p, len(coeffs)))
+
+    def _pattern(self, coeffs, n, scipy_sparse):
+        """Aggregate pattern U of the F_k, the (|U| x nvars) sparse matrix of
+        the F_k values on U, and the csr F_k of the variables present."""
+        mats = [scipy_sparse.csr_matrix(m) for m in coeffs]
+        active = [k for k, m in enumerate(mats) if m.nnz]
+        coos = [m.tocoo() for m in mats]
+        lin = [coo.row * n + coo.col for coo in coos]
+        pattern = unique(concatenate(lin)) if lin else array([], dtype=int)
+        rows, cols, data = [], [], []
+        for k, coo in enumerate(coos):
+            rows.append(searchsorted(pattern, lin[k]))
+            cols.append(zeros(coo.nnz, dtype=int) + k)
+            data.append(coo.data)
+        values = scipy_sparse.csr_matrix(
+            (concatenate(data), (concatenate(rows), concatenate(cols))),
+            shape=(len(pattern), len(mats))) if mats else None
+        return dict(rows=pattern // n, cols=pattern % n, values=values,
+                    active=active, mats=mats)
+
+    def apply(self, X):
+        """Compute `A(X) = [trace(F_i*X)]_i` for block matrices X."""
+        y = zeros(self.nvars)
+        for A, Xb in zip(self._svec, X):
+            y += A.T.dot(svec(Xb))
+        return y
+
+    def adjoint(self, y):
+        """Compute the block matrices `A*(y) = sum_i y_i*F_i`."""
+        y = asarray(y, dtype=float)
+        return [smat(A.dot(y), n)
+                for A, n in zip(self._svec, self.block_sizes)]
+
+    def schur(self, S, T=None):
+        """Compute the Schur complement matrix `M_ij = trace(F_i*S*F_j*T)`,
+        summed over all blocks, for symmetric block matrices S and T.
+
+        For each block only the variables present in it are visited, and
+        `S*F_j*T` is only evaluated on the aggregate sparsity pattern of the
+        block coefficients when that pattern is sparse.
+        """
+        if T is None:
+            T = S
+        M = zeros((self.nvars, self.nvars))
+        for block, n, Sb, Tb in zip(self._blocks, self.block_sizes, S, T):
+            active = block['active']
+            if not active:
+                continue
+            Sb = asarray(Sb, dtype=float)
+            Tb = asarray(Tb, dtype=float)
+            rows, cols = block['rows'], block['cols']
+            dense_pattern = len(rows) > n * n // 2
+            if not dense_pattern:
+                S_rows = Sb[cols, :]
+            G = empty((len(rows), len(active)))
+            for a, j in enumerate(active):
+                FjT = block['mats'][j].dot(Tb)
+                # trace(F_i*S*F_j*T) = sum_kl F_i[k, l] * (S*F_j*T)[l, k]
+                if dense_pattern:
+                    G[:, a] = Sb.dot(FjT)[cols, rows]
+                else:
+                    G[:, a] = (S_rows * FjT[:, rows].T).sum(axis=1)
+            M[:, active] += block['values'].T.dot(G)
+        return M
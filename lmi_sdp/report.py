@@ -0,0 +1,154 @@
+"""Structure reports of numerical and symbolic LMI problems"""
+
+__all__ = ['structure_report', 'lmi_structure_report']
+
+from numpy import array, asarray, zeros, bincount, unique, concatenate
+from sympy import Add
+
+from .lm import _optional_import, _nonzero_entries, _sym_entries
+from .sdp import _iter_slms, split_constraints
+
+
+def _report(block_sizes, nvars, patterns):
+    """Helper function building the structure report from the block sizes
+    and, for each block, the arrays `(mats, lin)` of the matrix number
+    (0 for constants, k for the k-th variable) and linear index `i*n + j` of
+    each nonzero entry."""
+    nblocks = len(block_sizes)
+    coeff_nnz = zeros((nblocks, nvars + 1), dtype=int)
+    aggregate_nnz = zeros(nblocks, dtype=int)
+    for b, (mats, lin) in enumerate(patterns):
+        coeff_nnz[b] = bincount(mats, minlength=nvars + 1)
+        aggregate_nnz[b] = len(unique(lin))
+    sizes = asarray(block_sizes, dtype=int)
+    incidence = coeff_nnz[:, 1:] > 0
+    vars_per_block = incidence.sum(axis=1)
+
+    # M_ij = sum_b trace(F_i^b S F_j^b S) is structurally nonzero iff
+    # variables i and j share a block
+    scipy_sparse = _optional_import('scipy.sparse')
+    if scipy_sparse is not None:
+        inc = scipy_sparse.csr_matrix(incidence.astype(int))
+        schur_nnz = inc.T.dot(inc).nnz
+    else:
+        schur_nnz = int((incidence.T.astype(int).dot(incidence) > 0).sum())
+
+    return {
+        'nvars': nvars,
+        'nblocks': nblocks,
+        'block_sizes': list(block_sizes),
+        'total_size': int(sizes.sum()),
+        'coeff_nnz': coeff_nnz,
+        'const_nnz': coeff_nnz[:, 0],
+        'var_nnz': coeff_nnz[:, 1:].sum(axis=0),
+        'aggregate_nnz': aggregate_nnz,
+        'block_density': aggregate_nnz / (sizes**2).clip(1).astype(float),
+        'incidence': incidence,
+        'vars_per_block': vars_per_block,
+        'blocks_per_var': incidence.sum(axis=0),
+        'schur_nnz': schur_nnz,
+        'schur_density': schur_nnz / float(max(nvars, 1)**2),
+        'schur_flops': int((vars_per_block * sizes**3 +
+                            vars_per_block**2 * sizes**2).sum()),
+    }
+
+
+def structure_report(lmi_coeffs):
+    """Compute structure statistics of numerical LMIs.
+
+    Parameters
+    ----------
+    lmi_coeffs: list of numerical LMIs, as returned by lmi_to_coeffs
+
+    Returns
+    -------
+    report: dict
+        With, for nblocks blocks and nvars variables:
+
+        - 'nvars', 'nblocks', 'block_sizes' and 'total_size';
+        - 'coeff_nnz': (nblocks, nvars + 1) int array of the number of
+          nonzeros of the constant (column 0) and of each variable
+          coefficient matrix of each block, with 'const_nnz' its first
+          column and 'var_nnz' its column sums over the variables;
+        - 'aggregate_nnz' and 'block_density': nonzeros of the aggregate
+          sparsity pattern of each block, and its fraction of the block;
+        - 'incidence': (nblocks, nvars) bool array of the variables
+          appearing in each block, with 'vars_per_block' and
+          'blocks_per_var' its row and column sums;
+        - 'schur_nnz' and 'schur_density': structural nonzeros of the
+          Schur complement matrix (see LMIOperator.schur), and their
+          fraction;
+        - 'schur_flops': a rough estimate of the flops needed to form the
+          Schur complement matrix with dense blocks.
+
+    Example
+    -------
+    >>> from sympy import Matrix
+    >>> from sympy.abc import x, y, z
+    >>> from lmi_sdp import LMI_PSD, lmi_to_coeffs, structure_report
+    >>> lmis = [LMI_PSD(Matrix([[x, y], [y, 1]])), LMI_PSD(Matrix([[z]]))]
+    >>> report = structure_report(lmi_to_coeffs(lmis, [x, y, z]))
+    >>> report['block_sizes'], report['schur_nnz']
+    ([2, 1], 5)
+    >>> report['coeff_nnz'].tolist()
+    [[1, 1, 2, 0], [0, 0, 0, 1]]
+    """
+    block_sizes = []
+    patterns = []
+    nvars = 0
+    for coeffs, const in lmi_coeffs:
+        n = const.shape[0]
+        nvars = len(coeffs)
+        mats = []
+        lin = []
+        for k, m in enumerate([const] + list(coeffs)):
+            rows, cols, vals = _nonzero_entries(m)
+            nz = asarray(vals) != 0
+            lin.append(asarray(rows, dtype=int)[nz] * n +
+                       asarray(cols, dtype=int)[nz])
+            mats.append(zeros(len(lin[-1]), dtype=int) + k)
+        block_sizes.append(n)
+        patterns.append((concatenate(mats), concatenate(lin)))
+    return _report(block_sizes, nvars, patterns)
+
+
+def lmi_structure_report(lmis, variables, split_blocks=False):
+    """Compute structure statistics of symbolic LMIs from their nonzero
+    pattern only, without extracting coefficients.
+
+    Each nonzero entry counts as a nonzero of the coefficient matrix of
+    each variable among its free symbols, and of the constant matrix if it
+    has no variables or is a sum with a term free of variables. Entries are
+    not expanded, so terms cancelling out are still counted.
+
+    Parameters
+    ----------
+    lmis: symbolic LMI, Matrix or Eq, or a list of them
+        Linear equalities (sympy.Eq) are skipped.
+    variables: list of symbols
+    split_blocks: bool or string
+        See lmi_to_coeffs.
+
+    Returns
+    -------
+    report: dict
+        See structure_report.
+    """
+    index = dict((x, k + 1) for k, x in enumerate(variables))
+    variables_set = set(index)
+    block_sizes = []
+    patterns = []
+    for idx, slm in _iter_slms(split_constraints(lmis)[0], split_blocks):
+        n = slm.rows
+        mats = []
+        lin = []
+        for (i, j), expr in _sym_entries(slm):
+            ks = [index[s] for s in expr.free_symbols if s in index]
+            if not ks or any(not (t.free_symbols & variables_set)
+                             for t in Add.make_args(expr)):
+                ks.append(0)
+            mats += ks
+            lin += [i * n + j] * len(ks)
+        block_sizes.append(n)
+        patterns.append((array(mats, dtype=int), array(lin, dtype=int)))
+    return _report(block_sizes, len(variables), patterns)
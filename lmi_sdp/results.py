@@ -0,0 +1,132 @@
+"""Numerical evaluation of LMIs at solver results"""
+
+__all__ = ['LMIResults']
+
+from numpy import zeros, sort, concatenate
+from numpy.linalg import eigvalsh
+from sympy import Basic, Equality
+
+from .sdp import lmi_to_coeffs
+from .scaling import _dense
+
+
+def _block_diag(blocks):
+    """Helper function assembling square numpy blocks into a block diagonal
+    numpy array."""
+    n = sum(b.shape[0] for b in blocks)
+    m = zeros((n, n))
+    i = 0
+    for b in blocks:
+        m[i:i+b.shape[0], i:i+b.shape[0]] = b
+        i += b.shape[0]
+    return m
+
+
+class LMIResults(object):
+    """Numerical LMIs evaluated at a solution `x`.
+
+    Each LMI matrix `F(x) = F0 + sum_i x_i*F_i` (in canonical `F(x) >= 0`
+    form) is evaluated from its numerical coefficients, block by block, and
+    blocks coming from the same original LMI (see split_blocks in
+    lmi_to_coeffs) are joined back together, so that results line up with
+    the LMIs given by the user. SymPy is not used.
+
+    Parameters
+    ----------
+    lmi_coeffs: list of numerical LMIs, as returned by lmi_to_coeffs
+    x: solution vector (list, numpy array or cvxopt matrix)
+    lmi_index: list of ints or None
+        For each numerical LMI, the index of the original LMI it is a
+        diagonal block of, in order, as returned by lmi_to_coeffs with
+        return_index set. If None, each numerical LMI is taken as an LMI of
+        its own. Results are given for each distinct index, in increasing
+        order, so indices may skip positions (e.g., of equalities in a list
+        of constraints).
+    duals: list of matrices or None
+        Dual matrices of each numerical LMI, e.g., `sol['zs']` of
+        cvxopt.solvers.sdp for a problem exported with to_cvxopt without
+        linear_cone, eliminate_equalities nor chordal_decomposition.
+
+    Attributes
+    ----------
+    x: numpy array
+    positions: list of ints
+        The distinct indices of lmi_index, i.e., the index of the LMI each
+        result refers to.
+    slack_blocks: list of lists of numpy arrays
+        For each LMI, `F(x)` of each of its blocks.
+    dual_blocks: list of lists of numpy arrays, or None
+        For each LMI, the dual matrix of each of its blocks.
+    eigenvalues: list of numpy arrays
+        For each LMI, the sorted eigenvalues of `F(x)`.
+    """
+
+    def __init__(self, lmi_coeffs, x, lmi_index=None, duals=None):
+        self.x = _dense(x).flatten()
+        lmi_coeffs = list(lmi_coeffs)
+        if lmi_index is None:
+            lmi_index = range(len(lmi_coeffs))
+        self.lmi_index = list(lmi_index)
+        self.positions = sorted(set(self.lmi_index))
+        result = dict((p, n) for n, p in enumerate(self.positions))
+
+        x_nz = self.x.nonzero()[0]
+        self.slack_blocks = [[] for p in self.positions]
+        for (coeffs, const), i in zip(lmi_coeffs, self.lmi_index):
+            value = const * 1.0
+            for k in x_nz:
+                value = value + self.x[k] * coeffs[k]
+            self.slack_blocks[result[i]].append(_dense(value))
+
+        self.dual_blocks = None
+        if duals is not None:
+            self.dual_blocks = [[] for p in self.positions]
+            for Z, i in zip(duals, self.lmi_index):
+                self.dual_blocks[result[i]].append(_dense(Z))
+
+        self.eigenvalues = [sort(concatenate([eigvalsh(S) for S in blocks]))
+                            for blocks in self.slack_blocks]
+
+    @classmethod
+    def from_lmis(cls, lmis, variables, x, split_blocks=True, duals=None,
+                  sparse=False):
+        """Extract the coefficients of symbolic LMIs, keeping track of
+        their blocks, and evaluate them at x.
+
+        lmis may also contain linear equalities (sympy.Eq), which are
+        skipped; lmi_index and positions then refer to the positions in
+        lmis. split_blocks and sparse are as in lmi_to_coeffs; split_blocks
+        defaults to True, as in to_cvxopt, so that duals of the blocks
+        exported by to_cvxopt line up. If the coefficients were already
+        extracted, pass them to LMIResults along with the lmi_index
+        returned by lmi_to_coeffs with return_index set instead.
+        """
+        if isinstance(lmis, Basic):
+            lmis = [lmis]
+        positions = [p for p, lmi in enumerate(lmis)
+                     if not isinstance(lmi, Equality)]
+        lmi_coeffs, lmi_index = lmi_to_coeffs([lmis[p] for p in positions],
+                                              variables, split_blocks,
+                                              sparse, return_index=True)
+        return cls(lmi_coeffs, x, [positions[i] for i in lmi_index], duals)
+
+    @property
+    def slacks(self):
+        """Matrices `F(x)` of each LMI."""
+        return [_block_diag(blocks) for blocks in self.slack_blocks]
+
+    @property
+    def duals(self):
+        """Dual matrices of each LMI (None if no duals were given)."""
+        if self.dual_blocks is None:
+            return None
+        return [_block_diag(blocks) for blocks in self.dual_blocks]
+
+    @property
+    def min_eigenvalues(self):
+        """Smallest eigenvalue of `F(x)` of each LMI, i.e., its margin."""
+        return [float(ev[0]) for ev in self.eigenvalues]
+
+    def is_feasible(self, tol=0.0):
+        """Check whether `F(x) >= -tol*I` for all LMIs."""
+        return all(ev >= -tol for ev in self.min_eigenvalues)
@@ -0,0 +1,170 @@
+"""Numerical scaling (equilibration) of numerical LMIs"""
+
+__all__ = ['Scaling', 'equilibrate']
+
+from numpy import array, asarray, ones, zeros, outer, sqrt, abs as np_abs, \
+    maximum, concatenate
+
+from .lm import _optional_import, _nonzero_entries
+
+
+def _dense(m):
+    """Helper function converting a numpy, scipy or cvxopt matrix to a
+    numpy array of floats."""
+    if hasattr(m, 'toarray'):
+        m = m.toarray()
+    return array(m, dtype=float)
+
+
+class Scaling(object):
+    """Diagonal scaling of a problem, as computed by equilibrate.
+
+    The equilibrated problem is written w.r.t. the scaled variables
+    `x_s = x / variable_scale`, and each of its LMIs is the congruence
+    `E_b*F_b(x)*E_b` of an original LMI, where `E_b = diag(block_scales[b])`.
+    Primal-dual solutions of the equilibrated problem are mapped back to the
+    original problem with the unscale_* methods.
+
+    Attributes
+    ----------
+    variable_scale: numpy array
+    block_scales: list of numpy arrays
+    linear_blocks: list of bools
+        Set by to_cvxopt: which blocks were passed in the linear cone.
+    """
+
+    def __init__(self, variable_scale, block_scales):
+        self.variable_scale = variable_scale
+        self.block_scales = block_scales
+        self.linear_blocks = [False] * len(block_scales)
+
+    def unscale_primal(self, x):
+        """Map scaled variables back to the original variables."""
+        return self.variable_scale * asarray(x, dtype=float).flatten()
+
+    def unscale_slack(self, S):
+        """Map the slack blocks `S_b = F_b(x)` back to the original LMIs."""
+        return [_dense(Sb) / outer(e, e)
+                for Sb, e in zip(S, self.block_scales)]
+
+    def unscale_dual(self, Z):
+        """Map the dual blocks back to the original LMIs."""
+        return [_dense(Zb) * outer(e, e)
+                for Zb, e in zip(Z, self.block_scales)]
+
+    def unscale_cvxopt(self, sol):
+        """Unscale a solution returned by cvxopt.solvers.sdp for a problem
+        exported by to_cvxopt with equilibrate set.
+
+        Returns a dict with the unscaled 'x', 'ss' and 'zs' (and 'sl', 'zl'
+        if the linear cone was used, and 'y' if equalities were exported) as
+        numpy arrays.
+        """
+        sdp = [e for e, lin in zip(self.block_scales, self.linear_blocks)
+               if not lin]
+        ret = {'x': self.unscale_primal(_dense(sol['x']))}
+        if sol.get('ss') is not None:
+            ret['ss'] = [_dense(Sb) / outer(e, e)
+                         for Sb, e in zip(sol['ss'], sdp)]
+            ret['zs'] = [_dense(Zb) * outer(e, e)
+                         for Zb, e in zip(sol['zs'], sdp)]
+        if any(self.linear_blocks) and sol.get('sl') is not None:
+            lp = [e for e, lin in zip(self.block_scales, self.linear_blocks)
+                  if lin]
+            e2 = concatenate(lp)**2
+            ret['sl'] = _dense(sol['sl']).flatten() / e2
+            ret['zl'] = _dense(sol['zl']).flatten() * e2
+        if sol.get('y') is not None:
+            ret['y'] = _dense(sol['y']).flatten()
+        return ret
+
+
+def _scaled(m, d, e):
+    """Helper function computing `d*E*m*E`, keeping m's type."""
+    if hasattr(m, 'toarray'):
+        E = _optional_import('scipy.sparse').diags(e)
+        return (E.dot(m).dot(E) * d).asformat(m.format)
+    return asarray(m, dtype=float) * outer(e * d, e)
+
+
+def equilibrate(obj_coeffs, lmi_coeffs, iterations=20, tol=1e-3):
+    """Equilibrate a numerical problem by diagonal scaling.
+
+    Ruiz-style iterations compute a positive scale for each variable and, for
+    each LMI, a positive diagonal congruence, so that the largest absolute
+    value of every variable column and of every LMI row of the coefficients
+    approaches 1. The constant terms are scaled along but do not take part
+    in the computation.
+
+    Parameters
+    ----------
+    obj_coeffs: list of floats, as returned by objective_to_coeffs
+    lmi_coeffs: list of numerical LMIs, as returned by lmi_to_coeffs
+        Dense or sparse.
+    iterations: int
+        Maximum number of iterations.
+    tol: float
+        Iterations stop once all column and row maxima are within tol of 1.
+
+    Returns
+    -------
+    obj_coeffs: list of floats
+    lmi_coeffs: list of numerical LMIs
+        The equilibrated problem, w.r.t. the scaled variables.
+    scaling: Scaling
+        The scaling, used to recover the solution of the original problem.
+
+    Example
+    -------
+    >>> from numpy import array
+    >>> from lmi_sdp import equilibrate
+    >>> lmi_coeffs = [([array([[1e4, 0.], [0., 1e-2]])],
+    ...                array([[1., 0.], [0., 1.]]))]
+    >>> obj, lmi, scaling = equilibrate([1.], lmi_coeffs)
+    >>> lmi[0][0][0].round(2).tolist()
+    [[1.0, 0.0], [0.0, 1.0]]
+    """
+    lmi_coeffs = list(lmi_coeffs)
+    nvars = len(obj_coeffs)
+
+    entries = []
+    for coeffs, const in lmi_coeffs:
+        var, rows, cols, vals = [], [], [], []
+        for k, m in enumerate(coeffs):
+            r, c, v = _nonzero_entries(m)
+            var.append(zeros(len(r), dtype=int) + k)
+            rows.append(asarray(r, dtype=int))
+            cols.append(asarray(c, dtype=int))
+            vals.append(np_abs(asarray(v, dtype=float)))
+        if var:
+            entries.append(tuple(concatenate(a)
+                                 for a in (var, rows, cols, vals)))
+        else:
+            entries.append(tuple(zeros(0, dtype=int) for a in range(4)))
+
+    d = ones(nvars)
+    es = [ones(const.shape[0]) for coeffs, const in lmi_coeffs]
+    for it in range(iterations):
+        col_max = zeros(nvars)
+        row_maxs = []
+        for (var, rows, cols, vals), e in zip(entries, es):
+            v = vals * d[var] * e[rows] * e[cols]
+            maximum.at(col_max, var, v)
+            row_max = zeros(len(e))
+            maximum.at(row_max, rows, v)
+            row_maxs.append(row_max)
+        maxima = concatenate([col_max] + row_maxs)
+        maxima = maxima[maxima > 0]
+        if not len(maxima) or np_abs(maxima - 1).max() <= tol:
+            break
+        col_max[col_max == 0] = 1.
+        d /= sqrt(col_max)
+        for e, row_max in zip(es, row_maxs):
+            row_max[row_max == 0] = 1.
+            e /= sqrt(row_max)
+
+    obj_coeffs = [float(c) for c in d * asarray(obj_coeffs, dtype=float)]
+    lmi_coeffs = [([_scaled(m, d[k], e) for k, m in enumerate(coeffs)],
+                   _scaled(const, 1., e))
+                  for (coeffs, const), e in zip(lmi_coeffs, es)]
+    return obj_coeffs, lmi_coeffs, Scaling(d, es)
@@ -1,9 +1,17 @@
 """Interfaces to SDP solvers"""
 
+import tempfile
+from itertools import chain
 
-from sympy import Basic, ordered, sympify, BlockDiagMatrix
-from .lm import lin_expr_coeffs, lm_sym_to_coeffs
+from sympy import Basic, Equality, ordered, sympify, BlockDiagMatrix
+from numpy import zeros, array, asarray, hstack, concatenate, char, where, \
+    abs as np_abs, argmax
+from .lm import lin_expr_coeffs, lm_sym_to_coeffs, iter_lm_triplets, \
+    NonLinearExpressionError, _optional_import, _poly_lms_to_coeffs
 from .lmi import LMI
+from .chordal import chordal_decomposition as _chordal_decomposition
+from .storage import CoeffStore
+from .scaling import equilibrate as _equilibrate
 
 
 class NotAvailableError(Exception):
@@ -12,18 +20,14 @@ class NotAvailableError(Exception):
               'was not found' % function_name
         Exception.__init__(self, msg)
 
-try:
-    import scipy
-except ImportError:  # pragma: no cover
-    scipy = None
 
-try:
-    import cvxopt
-except ImportError:  # pragma: no cover
-    cvxopt = None
+class InconsistentEqualitiesError(ValueError):
+    pass
 
 
-def lmi_to_coeffs(lmi, variables, split_blocks=False, sparse=False):
+def lmi_to_coeffs(lmi, variables, split_blocks=False, sparse=False,
+                  out_of_core=False, memory_budget=64*2**20, backend='expr',
+                  return_index=False):
     """Transforms LMIs from symbolic to numerical.
 
     Parameters
@@ -37,6 +41,20 @@ def lmi_to_coeffs(lmi, variables, split_blocks=False, sparse=False):
         funtion does not try to subdivide them any further.
     sparse: bool
         Set whether return matrices dense or sparse. Dense by default.
+    out_of_core: bool or string
+        If set, coefficients are not returned as matrices but appended to an
+        on-disk CoeffStore (see lmi_sdp.CoeffStore), in a temporary directory
+        if set to True or in the given directory if set to a path. sparse is
+        then ignored.
+    memory_budget: int
+        Bytes of memory used to buffer coefficients when out_of_core is set.
+    backend: 'expr' or 'poly'
+        Extraction backend (see lm_sym_to_coeffs), when out_of_core is not
+        set. With 'poly', the entries of all LMIs are converted together.
+    return_index: bool
+        If set to True, the index of the LMI each numerical LMI comes from
+        is returned too (see split_blocks), e.g., to be passed to
+        LMIResults along with the coefficients.
 
     Returns
     -------
@@ -47,6 +65,11 @@ def lmi_to_coeffs(lmi, variables, split_blocks=False, sparse=False):
         coefficients (constants not  multipling by any variable). The
         numerical coefficients are extracted from the matrix `M` of the
         canonical PSD (or PD) LMI form `M>=0` (or `M>0`).
+        If out_of_core is set, a CoeffStore is returned instead; it should
+        be closed once no longer needed to remove its files.
+    lmi_index: list of ints
+        Only if return_index is set: for each numerical LMI, the index of
+        the LMI (in lmi) it is a diagonal block of.
 
     Example
     -------
@@ -63,33 +86,81 @@ def lmi_to_coeffs(lmi, variables, split_blocks=False, sparse=False):
            [ 0.,  1.]])], array([[ 3., -2.],
            [-2.,  0.]]))]
     """
+    lmi_index = []
+    if out_of_core:
+        directory = None if out_of_core is True else out_of_core
+        coeffs = CoeffStore(len(variables), directory, memory_budget)
+        for idx, slm in _iter_slms(lmi, split_blocks):
+            lmi_index.append(idx)
+            coeffs.add_block(slm.rows,
+                             iter_lm_triplets(slm, variables, upper=True))
+    elif backend == 'poly':
+        slms = []
+        for idx, slm in _iter_slms(lmi, split_blocks):
+            lmi_index.append(idx)
+            slms.append(slm)
+        coeffs = _poly_lms_to_coeffs(slms, variables, sparse)
+    else:
+        coeffs = []
+        for idx, slm in _iter_slms(lmi, split_blocks):
+            lmi_index.append(idx)
+            coeffs.append(lm_sym_to_coeffs(slm, variables, sparse, backend))
+
+    if return_index:
+        return coeffs, lmi_index
+    return coeffs
+
+
+def _iter_slms(lmi, split_blocks=False):
+    """Helper generator yielding `(lmi_index, slm)` for the canonical
+    matrices of each LMI, or of each of their diagonal blocks if
+    split_blocks is set (see lmi_to_coeffs)."""
     if isinstance(lmi, Basic):
         lmis = [lmi]
     else:
         lmis = list(lmi)
 
-    slms = []  # SLM stands for 'Symmetric Linear Matrix'
-    for lmi in lmis:
+    for idx, lmi in enumerate(lmis):
         if lmi.is_Matrix:
             lmi = LMI(lmi)
-        lm = lmi.canonical().gts
-        slms.append(lm)
-
-    if split_blocks:
-        orig_slms = slms
-        slms = []
-        for slm in orig_slms:
-            if isinstance(slm, BlockDiagMatrix):
-                if split_blocks == 'BlockDiagMatrix':
-                    slms += slm.diag
-                else:
-                    slms += sum([d.get_diag_blocks() for d in slm.diag], [])
+        slm = lmi.canonical().gts  # SLM stands for 'Symmetric Linear Matrix'
+        if not split_blocks:
+            slms = [slm]
+        elif isinstance(slm, BlockDiagMatrix):
+            if split_blocks == 'BlockDiagMatrix':
+                slms = slm.diag
             else:
-                slms += slm.get_diag_blocks()
+                slms = sum([d.get_diag_blocks() for d in slm.diag], [])
+        else:
+            slms = slm.get_diag_blocks()
+        for slm in slms:
+            yield idx, slm
 
-    coeffs = [lm_sym_to_coeffs(slm, variables, sparse) for slm in slms]
 
-    return coeffs
+def iter_lmi_coeffs(lmi, variables, split_blocks=False, sparse=False,
+                    backend='expr'):
+    """Generator version of lmi_to_coeffs.
+
+    Each LMI (or diagonal block, see split_blocks) is canonicalized and its
+    coefficients extracted only when the next item is requested, so only one
+    block needs to be held in memory at a time.
+
+    Parameters
+    ----------
+    See lmi_to_coeffs.
+
+    Yields
+    ------
+    block_index: int
+        Position of the block in the output of lmi_to_coeffs.
+    coeffs: list of numpy arrays (or sparse matrices)
+        Coefficients of each variable.
+    const: numpy array (or sparse matrix)
+        Zero order coefficients.
+    """
+    for b, (idx, slm) in enumerate(_iter_slms(lmi, split_blocks)):
+        coeffs, const = lm_sym_to_coeffs(slm, variables, sparse, backend)
+        yield b, coeffs, const
 
 
 def objective_to_coeffs(objective_func, variables,
@@ -135,13 +206,355 @@ def objective_to_coeffs(objective_func, variables,
     return coeffs
 
 
+def split_constraints(constraints):
+    """Separate a list of constraints into LMIs and linear equalities.
+
+    Parameters
+    ----------
+    constraints: symbolic LMI, Matrix or Eq, or a list of them
+
+    Returns
+    -------
+    lmis: list
+        The LMIs (and matrices) found in constraints, in order.
+    eqs: list
+        The symbolic equalities (sympy.Eq) found in constraints, in order.
+    """
+    if isinstance(constraints, Basic):
+        constraints = [constraints]
+    lmis = []
+    eqs = []
+    for constraint in constraints:
+        if isinstance(constraint, Equality):
+            eqs.append(constraint)
+        else:
+            lmis.append(constraint)
+    return lmis, eqs
+
+
+def eq_to_coeffs(eqs, variables, sparse=False):
+    """Transforms linear equalities from symbolic to numerical.
+
+    Parameters
+    ----------
+    eqs: symbolic equality (sympy.Eq), or a list of them
+        Equalities with matrix sides are taken element-wise.
+    variables: list of symbols
+    sparse: bool
+        Set whether the returned matrix is dense or sparse. Dense by default.
+
+    Returns
+    -------
+    A: numpy array or scipy.sparse.lil_matrix
+        Matrix with one row per scalar equality and one column per variable.
+    b: numpy array
+        Right-hand side such that the equalities read `A*x = b`.
+
+    Example
+    -------
+    >>> from sympy import Eq
+    >>> from sympy.abc import x, y, z
+    >>> from lmi_sdp import eq_to_coeffs
+    >>> A, b = eq_to_coeffs([Eq(x + 2*y, 1), Eq(z, y - 3)], [x, y, z])
+    >>> A.tolist()
+    [[1.0, 2.0, 0.0], [0.0, -1.0, 1.0]]
+    >>> b.tolist()
+    [1.0, -3.0]
+    """
+    if isinstance(eqs, Basic):
+        eqs = [eqs]
+
+    exprs = []
+    for eq in eqs:
+        diff = eq.lhs - eq.rhs
+        if getattr(diff, 'is_Matrix', False):
+            exprs += list(diff)
+        else:
+            exprs.append(diff)
+
+    scipy_sparse = _optional_import('scipy.sparse') if sparse else None
+    if scipy_sparse:
+        A = scipy_sparse.lil_matrix((len(exprs), len(variables)))
+    else:
+        A = zeros((len(exprs), len(variables)))
+    b = zeros(len(exprs))
+
+    for r, expr in enumerate(exprs):
+        try:
+            coeffs, const = lin_expr_coeffs(expr, variables)
+        except NonLinearExpressionError:
+            raise NonLinearExpressionError(
+                "equalities must be linear w.r.t. 'variables'")
+        for i, coeff in enumerate(coeffs):
+            if coeff != 0:
+                A[r, i] = coeff
+        b[r] = -const
+
+    return A, b
+
+
+def eliminate_equalities(A, b, sparse=False, tol=1e-9):
+    """Parametrize the solutions of linear equalities `A*x = b`.
+
+    Gauss-Jordan elimination with partial pivoting is used to find a
+    particular solution `x0` and a nullspace basis `N` of `A` such that every
+    solution is `x = x0 + N*z`. The basis is built from the free (non-pivot)
+    variables, so it is as sparse as the reduced equalities and redundant
+    equalities are dropped. If A is a scipy sparse matrix, rows are kept
+    sparse during the elimination, and only the rows with a nonzero in the
+    pivot column are updated.
+
+    Parameters
+    ----------
+    A: numpy array or scipy sparse matrix
+    b: numpy array
+    sparse: bool
+        Set whether `N` is returned as a dense numpy array or as a
+        scipy.sparse.csc_matrix. Dense by default.
+    tol: float
+        Absolute tolerance below which pivots and residuals are taken as zero.
+
+    Returns
+    -------
+    x0: numpy array
+        Particular solution.
+    N: numpy array or scipy.sparse.csc_matrix
+        Nullspace basis, one column per remaining free variable.
+
+    Example
+    -------
+    >>> from numpy import array
+    >>> from lmi_sdp import eliminate_equalities
+    >>> x0, N = eliminate_equalities(array([[1., 2., 0.]]), array([1.]))
+    >>> x0.tolist()
+    [1.0, 0.0, 0.0]
+    >>> N.tolist()
+    [[-2.0, 0.0], [1.0, 0.0], [0.0, 1.0]]
+    """
+    if hasattr(A, 'tocsr'):
+        return _eliminate_sparse(A, b, sparse, tol)
+    M = array(A, dtype=float)
+    rhs = array(b, dtype=float).flatten()
+    m, n = M.shape
+
+    pivots = []
+    r = 0
+    for j in range(n):
+        if r == m:
+            break
+        p = r + argmax(np_abs(M[r:, j]))
+        if abs(M[p, j]) <= tol:
+            continue
+        if p != r:
+            M[[r, p]] = M[[p, r]]
+            rhs[[r, p]] = rhs[[p, r]]
+        piv = M[r, j]
+        M[r] /= piv
+        rhs[r] /= piv
+        for i in M[:, j].nonzero()[0]:
+            if i != r:
+                rhs[i] -= M[i, j] * rhs[r]
+                M[i] -= M[i, j] * M[r]
+        pivots.append(j)
+        r += 1
+
+    if (np_abs(rhs[r:]) > tol).any():
+        raise InconsistentEqualitiesError('equalities have no solution')
+
+    x0 = zeros(n)
+    x0[pivots] = rhs[:r]
+
+    pivot_set = set(pivots)
+    free = [j for j in range(n) if j not in pivot_set]
+    scipy_sparse = _optional_import('scipy.sparse') if sparse else None
+    if scipy_sparse:
+        N = scipy_sparse.lil_matrix((n, len(free)))
+    else:
+        N = zeros((n, len(free)))
+    for k, j in enumerate(free):
+        N[j, k] = 1.0
+        for row, p in enumerate(pivots):
+            if abs(M[row, j]) > tol:
+                N[p, k] = -M[row, j]
+    if scipy_sparse:
+        N = N.tocsc()
+
+    return x0, N
+
+
+def _eliminate_sparse(A, b, sparse, tol):
+    """Helper function implementing eliminate_equalities for a scipy sparse
+    A, with rows stored as {column: value} dicts."""
+    A = A.tocsr()
+    m, n = A.shape
+    rows = []
+    col_rows = [set() for j in range(n)]  # rows with a nonzero in column j
+    for i in range(m):
+        sl = slice(A.indptr[i], A.indptr[i+1])
+        rows.append(dict((j, float(v)) for j, v in
+                         zip(A.indices[sl], A.data[sl]) if v != 0))
+        for j in rows[i]:
+            col_rows[j].add(i)
+    rhs = [float(v) for v in asarray(b, dtype=float).flatten()]
+
+    pivots = []  # (column, row) pairs
+    used = set()
+    for j in range(n):
+        if len(used) == m:
+            break
+        candidates = [i for i in col_rows[j] if i not in used]
+        if not candidates:
+            continue
+        p = max(candidates, key=lambda i: (abs(rows[i][j]), -i))
+        piv = rows[p][j]
+        if abs(piv) <= tol:
+            continue
+        row_p = rows[p]
+        for c in row_p:
+            row_p[c] /= piv
+        rhs[p] /= piv
+        for i in list(col_rows[j]):
+            if i == p:
+                continue
+            row_i = rows[i]
+            f = row_i[j]
+            rhs[i] -= f * rhs[p]
+            for c, v in row_p.items():
+                new = row_i.get(c, 0.) - f * v
+                if c == j or new == 0:
+                    if c in row_i:
+                        del row_i[c]
+                        col_rows[c].discard(i)
+                else:
+                    if c not in row_i:
+                        col_rows[c].add(i)
+                    row_i[c] = new
+        pivots.append((j, p))
+        used.add(p)
+
+    if any(abs(rhs[i]) > tol for i in range(m) if i not in used):
+        raise InconsistentEqualitiesError('equalities have no solution')
+
+    x0 = zeros(n)
+    for j, p in pivots:
+        x0[j] = rhs[p]
+
+    pivot_cols = set(j for j, p in pivots)
+    free = [j for j in range(n) if j not in pivot_cols]
+    free_index = dict((j, k) for k, j in enumerate(free))
+    N_rows, N_cols, N_vals = list(free), list(range(len(free))), \
+        [1.0] * len(free)
+    for j, p in pivots:
+        for c, v in rows[p].items():
+            if c in free_index and abs(v) > tol:
+                N_rows.append(j)
+                N_cols.append(free_index[c])
+                N_vals.append(-v)
+
+    scipy_sparse = _optional_import('scipy.sparse')
+    N = scipy_sparse.csc_matrix((N_vals, (N_rows, N_cols)),
+                                shape=(n, len(free)))
+    if not sparse:
+        N = N.toarray()
+    return x0, N
+
+
+def _nullspace_columns(N):
+    """Helper function yielding (row indices, values) of each column of N."""
+    if hasattr(N, 'tocsc'):
+        N = N.tocsc()
+        for k in range(N.shape[1]):
+            sl = slice(N.indptr[k], N.indptr[k+1])
+            yield N.indices[sl], N.data[sl]
+    else:
+        for k in range(N.shape[1]):
+            rows = N[:, k].nonzero()[0]
+            yield rows, N[rows, k]
+
+
+def reduce_coeffs(lmi_coeffs, x0, N):
+    """Substitute `x = x0 + N*z` into numerical LMIs.
+
+    Parameters
+    ----------
+    lmi_coeffs: list of numerical LMIs, as returned by lmi_to_coeffs
+    x0, N: particular solution and nullspace basis, as returned by
+        eliminate_equalities
+
+    Returns
+    -------
+    coeffs: list of numerical LMIs
+        The same LMIs written w.r.t. the reduced variables `z`.
+    """
+    return list(_iter_reduced_coeffs(lmi_coeffs, x0, N))
+
+
+def _iter_reduced_coeffs(lmi_coeffs, x0, N):
+    """Generator version of reduce_coeffs, consuming lmi_coeffs lazily."""
+    columns = list(_nullspace_columns(N))
+    x0_nz = x0.nonzero()[0]
+    for LMis, LM0 in lmi_coeffs:
+        const = LM0 * 1.0
+        for i in x0_nz:
+            const = const + x0[i] * LMis[i]
+        coeffs = []
+        for rows, vals in columns:
+            LMk = LM0 * 0.0
+            for i, v in zip(rows, vals):
+                LMk = LMk + v * LMis[i]
+            coeffs.append(LMk)
+        yield coeffs, const
+
+
+class Reduction(object):
+    """Elimination of linear equalities from a problem, as appended by the
+    exporters to their returned values when eliminate_equalities is set.
+
+    The exported problem is written w.r.t. the reduced variables `z`, where
+    the original variables are `x = x0 + N*z`, and its objective is
+    `c.T*x = c_z.T*z + offset`, `c` being the coefficients of the
+    minimization objective (see objective_to_coeffs).
+
+    Attributes
+    ----------
+    x0: numpy array
+        Particular solution of the equalities.
+    N: numpy array, scipy.sparse.csc_matrix or None
+        Nullspace basis of the equalities (see eliminate_equalities), or None
+        if there were no equalities to eliminate, i.e., `x = z`.
+    offset: float
+        Objective value at x0, `c.T*x0`.
+    """
+
+    def __init__(self, x0, N, offset):
+        self.x0 = x0
+        self.N = N
+        self.offset = offset
+
+    def expand(self, z):
+        """Map reduced variables back to the original variables.
+
+        Trailing entries of z past the reduced variables (as the coupling
+        variables appended by chordal_decomposition) are ignored.
+        """
+        z = asarray(z, dtype=float).flatten()
+        if self.N is None:
+            return self.x0 + z[:len(self.x0)]
+        return self.x0 + self.N.dot(z[:self.N.shape[1]])
+
+
 def get_variables(objective_func=0, lmis=None):
     """Extract free variables from objective_func and lmis.
+
+    lmis may also contain linear equalities (sympy.Eq).
     """
     if lmis is None:
         lmis = []
     variables = sympify(objective_func).free_symbols
     for lmi in lmis:
+        if isinstance(lmi, Equality):
+            variables |= lmi.free_symbols
+            continue
         if lmi.is_Matrix:
             lm = lmi
         else:
@@ -151,54 +564,218 @@ def get_variables(objective_func=0, lmis=None):
     return list(ordered(variables))
 
 
+def _problem_to_coeffs(objective_func, constraints, variables, objective_type,
+                       split_blocks, sparse, eliminate, chordal=False,
+                       lmi_coeffs=None):
+    """Helper funtion extracting objective, LMI and equality coefficients.
+
+    The LMI coefficients are returned as an iterator of numerical LMIs which
+    are only extracted as they are consumed (except when `chordal` is set,
+    since the decomposition numbers coupling variables across all LMIs).
+
+    If `eliminate` is True, equalities are eliminated and the returned
+    objective and LMI coefficients are w.r.t. the reduced variables, the
+    returned equality coefficients are None and a Reduction is returned
+    last (None otherwise). If `chordal` is True, LMIs are
+    decomposed and coupling variables are appended to the variables.
+    If given, `lmi_coeffs` are the already extracted numerical LMIs of the
+    constraints, used instead of extracting them.
+    """
+    lmis, eqs = split_constraints(constraints)
+    obj_coeffs = objective_to_coeffs(objective_func, variables,
+                                     objective_type)
+    if lmi_coeffs is None:
+        lmi_coeffs = ((coeffs, const) for b, coeffs, const in
+                      iter_lmi_coeffs(lmis, variables, split_blocks, sparse))
+    eq_coeffs = None
+    reduction = None
+    if eliminate:
+        reduction = Reduction(zeros(len(variables)), None, 0.0)
+    if eqs:
+        A, b = eq_to_coeffs(eqs, variables, sparse)
+        if eliminate:
+            x0, N = eliminate_equalities(A, b, sparse)
+            lmi_coeffs = _iter_reduced_coeffs(lmi_coeffs, x0, N)
+            reduction = Reduction(x0, N, float(array(obj_coeffs).dot(x0)))
+            obj_coeffs = [float(c) for c in N.T.dot(array(obj_coeffs))]
+        else:
+            eq_coeffs = (A, b)
+    if chordal:
+        lmi_coeffs, n_coupling = _chordal_decomposition(lmi_coeffs)
+        lmi_coeffs = iter(lmi_coeffs)
+        obj_coeffs = list(obj_coeffs) + [0.0]*n_coupling
+        if eq_coeffs is not None and n_coupling:
+            A, b = eq_coeffs
+            if hasattr(A, 'toarray'):
+                scipy_sparse = _optional_import('scipy.sparse')
+                A = scipy_sparse.hstack(
+                    [A, scipy_sparse.lil_matrix((A.shape[0], n_coupling))])
+            else:
+                A = hstack([A, zeros((A.shape[0], n_coupling))])
+            eq_coeffs = (A, b)
+    return obj_coeffs, lmi_coeffs, eq_coeffs, reduction
+
+
+def _eq_coeffs_to_lmi_coeffs(A, b):
+    """Helper funtion writing each equality `a*x = b` as the pair of 1x1
+    numerical LMIs `a*x - b >= 0` and `b - a*x >= 0`."""
+    dense = A.toarray() if hasattr(A, 'toarray') else A
+    lmi_coeffs = []
+    for r in range(dense.shape[0]):
+        for sign in [1, -1]:
+            lmi_coeffs.append(([array([[sign*a]]) for a in dense[r]],
+                               array([[-sign*b[r]]])))
+    return lmi_coeffs
+
+
+def _is_diagonal(m):
+    """Helper funtion checking whether a numerical matrix is diagonal."""
+    nzi, nzj = m.nonzero()
+    return (nzi == nzj).all()
+
+
+def _is_linear_block(LMis, LM0):
+    """Helper funtion checking whether a numerical LMI is diagonal
+    (including 1x1), i.e., whether it belongs to the linear cone."""
+    return _is_diagonal(LM0) and all(_is_diagonal(LMi) for LMi in LMis)
+
+
+def _stack_linear_blocks(lp_blocks, nvars):
+    """Helper funtion stacking the diagonals `(coeff vectors, const vector)`
+    of diagonal numerical LMIs into a single pair of the same form."""
+    coeffs = [concatenate([LPis[x] for LPis, LP0 in lp_blocks])
+              for x in range(nvars)]
+    const = concatenate([LP0 for LPis, LP0 in lp_blocks])
+    return coeffs, const
+
+
 def to_cvxopt(objective_func, lmis, variables, objective_type='minimize',
-              split_blocks=True):
+              split_blocks=True, eliminate_equalities=False,
+              chordal_decomposition=False, linear_cone=False,
+              equilibrate=False):
     """Prepare objective and LMI to be used with cvxopt SDP solver.
 
+    LMIs are extracted and converted to cvxopt matrices one block at a time.
+
     Parameters
     ----------
     objective_func: symbolic linear expression
-    lmi: symbolic LMI or Matrix, or a list of them
+    lmi: symbolic LMI, Matrix or Eq, or a list of them
     variables: list of symbols
         The variable symbols which form the LMI/SDP space.
     objective_type: 'maximize' or 'minimize', defaults to 'minimize'
     split_blocks: bool
         If set to True, function tries to subdivide each LMI into
         smaller diagonal blocks
+    eliminate_equalities: bool
+        If set to True, linear equalities (sympy.Eq) are eliminated and the
+        problem is posed w.r.t. the reduced variables `z`, where
+        `x = x0 + N*z` and `x0, N = eliminate_equalities(*eq_to_coeffs(...))`,
+        and a Reduction holding x0, N and the objective offset `c.T*x0` is
+        appended to the returned values; its expand method maps the solution
+        back.
+    chordal_decomposition: bool
+        If set to True, LMIs with chordal sparsity are decomposed into
+        smaller clique-sized LMIs (see lmi_sdp.chordal_decomposition); the
+        coupling variables are appended after the (reduced) variables.
+    linear_cone: bool
+        If set to True, 1x1 and diagonal blocks are stacked into a single
+        linear inequality `Gl*x <= hl` instead of being passed as SDP blocks.
+    equilibrate: bool
+        If set to True, the problem is equilibrated (see
+        lmi_sdp.equilibrate) before conversion, i.e., it is posed w.r.t.
+        scaled variables, and a Scaling is appended to the returned values;
+        its unscale_cvxopt method maps the solution back.
 
     Returns
     -------
     c, Gs, hs: parameters ready to be input to cvxopt.solvers.sdp()
+        If linear_cone is True, `Gl, hl` are returned too, i.e.,
+        `c, Gl, hl, Gs, hs`. If equalities are present and not eliminated,
+        `A, b` are appended, i.e., `c, Gs, hs, A, b` or
+        `c, Gl, hl, Gs, hs, A, b`. If eliminate_equalities is True, the
+        Reduction comes next, and if equilibrate is True, the Scaling comes
+        last.
     """
-    if cvxopt is None:
+    if _optional_import('cvxopt') is None:
         raise NotAvailableError(to_cvxopt.__name__)
 
-    obj_coeffs = objective_to_coeffs(objective_func, variables,
-                                     objective_type)
-    lmi_coeffs = lmi_to_coeffs(lmis, variables, split_blocks, sparse=False)
+    return _cvxopt_from_coeffs(
+        *_problem_to_coeffs(objective_func, lmis, variables, objective_type,
+                            split_blocks, False, eliminate_equalities,
+                            chordal_decomposition),
+        linear_cone=linear_cone, equilibrate=equilibrate)
+
+
+def _cvxopt_from_coeffs(obj_coeffs, lmi_coeffs, eq_coeffs, reduction=None,
+                        linear_cone=False, equilibrate=False):
+    """Helper funtion converting the output of _problem_to_coeffs to
+    cvxopt matrices (see to_cvxopt)."""
+    cvxopt = _optional_import('cvxopt')
+
+    scaling = None
+    if equilibrate:
+        obj_coeffs, lmi_coeffs, scaling = _equilibrate(obj_coeffs,
+                                                       lmi_coeffs)
+        if eq_coeffs is not None:
+            A, b = eq_coeffs
+            eq_coeffs = (A * scaling.variable_scale, b)
 
     c = cvxopt.matrix(obj_coeffs)
 
     Gs = []
     hs = []
+    lp_blocks = []
+    linear_blocks = []
 
     for (LMis, LM0) in lmi_coeffs:
+        linear_blocks.append(linear_cone and _is_linear_block(LMis, LM0))
+        if linear_blocks[-1]:
+            lp_blocks.append(([LMi.diagonal() for LMi in LMis],
+                              LM0.diagonal()))
+            continue
         #Gs.append([-LMi for LMi in LMis])
         #hs.append(LM0)
         Gs.append(cvxopt.matrix([(-LMi).flatten().astype(float).tolist()
                                  for LMi in LMis]))
         hs.append(cvxopt.matrix(LM0.astype(float).tolist()))
 
-    return c, Gs, hs
+    if linear_cone:
+        if not lp_blocks:
+            Gl = cvxopt.matrix(0.0, (0, len(obj_coeffs)))
+            hl = cvxopt.matrix(0.0, (0, 1))
+        else:
+            lp_coeffs = _stack_linear_blocks(lp_blocks, len(obj_coeffs))
+            Gl = cvxopt.matrix([(-LPi).astype(float).tolist()
+                                for LPi in lp_coeffs[0]])
+            hl = cvxopt.matrix(lp_coeffs[1].astype(float).tolist())
+
+    ret = (c, Gl, hl, Gs, hs) if linear_cone else (c, Gs, hs)
+
+    if eq_coeffs is not None:
+        A, b = eq_coeffs
+        ret += (cvxopt.matrix(A.T.tolist()), cvxopt.matrix(b.tolist()))
+
+    if reduction is not None:
+        ret += (reduction,)
 
+    if scaling is not None:
+        scaling.linear_blocks = linear_blocks
+        ret += (scaling,)
 
-def _sdpa_header(obj_coeffs, lmi_coeffs, comment=None):
-    """Helper funtion to generate headers of SDPA files."""
+    return ret
+
+
+def _sdpa_header(obj_coeffs, block_sizes, comment=None):
+    """Helper funtion to generate headers of SDPA files.
+
+    The linear (diagonal) block, if any, has negative size.
+    """
     s = '"' + comment + '"\n' if comment is not None else ''
     s += str(len(obj_coeffs)) + ' = ndim\n'
-    s += str(len(lmi_coeffs)) + ' = nblocks\n'
-    for block in lmi_coeffs:
-        s += str(block[0][1].shape[0]) + ' '
+    s += str(len(block_sizes)) + ' = nblocks\n'
+    for size in block_sizes:
+        s += str(size) + ' '
     s += '= blockstruct\n'
     for x in obj_coeffs:
         s += str(x) + ', '
@@ -206,17 +783,247 @@ def _sdpa_header(obj_coeffs, lmi_coeffs, comment=None):
     return s
 
 
+def _format_floats(m, precision=None):
+    """Helper funtion formatting all elements of a numerical array at once.
+
+    If precision is None, the shortest representation which round-trips
+    (the same as `str(float)`) is used, otherwise `precision` significant
+    digits are used.
+    """
+    m = asarray(m, dtype=float)
+    if precision is None:
+        return m.astype(str)
+    return char.mod('%%.%dg' % precision, m)
+
+
+def _sdpa_output(header, parts, file=None, sep=('', ''), spool=None):
+    """Helper funtion joining SDPA header and formatted blocks.
+
+    `sep` is the pair of strings written before and after the blocks of each
+    matrix number. If file is given, the output is written to it one block
+    at a time and None is returned, otherwise a string is returned. If
+    spool is given, parts are `(offset, length)` pairs of the formatted
+    blocks in this binary file (see _sdpa_blocks).
+    """
+    def _chunks():
+        yield header
+        for p in parts:
+            yield sep[0]
+            for chunk in p:
+                if spool is not None:
+                    offset, length = chunk
+                    spool.seek(offset)
+                    chunk = spool.read(length).decode('ascii')
+                yield chunk
+            yield sep[1]
+
+    if file is None:
+        return ''.join(_chunks())
+    for chunk in _chunks():
+        file.write(chunk)
+
+
+def _sdpa_blocks(obj_coeffs, lmi_coeffs, eq_coeffs, linear_cone,
+                 print_block, print_diag, spool=None):
+    """Helper funtion formatting numerical LMIs for SDPA files.
+
+    LMIs are consumed one at a time and formatted by
+    `print_block(x, b, m, sign)` (or by `print_diag(x, b, v, sign)` for the
+    merged linear block), where `x` is the matrix number (0 for constants)
+    and `b` the block number.
+
+    Returns the block sizes and, for the constants and each variable, the
+    list of formatted blocks. If spool is given, formatted blocks are
+    written to this binary file as soon as they are formatted, and only
+    their `(offset, length)` are kept.
+    """
+    if eq_coeffs is not None:
+        lmi_coeffs = chain(lmi_coeffs, _eq_coeffs_to_lmi_coeffs(*eq_coeffs))
+    nvars = len(obj_coeffs)
+    block_sizes = []
+    parts = [[] for x in range(nvars + 1)]
+    lp_blocks = []
+
+    def _add(x, chunk):
+        if spool is None:
+            parts[x].append(chunk)
+        elif chunk:
+            chunk = chunk.encode('ascii')
+            parts[x].append((spool.tell(), len(chunk)))
+            spool.write(chunk)
+
+    for LMis, LM0 in lmi_coeffs:
+        if linear_cone and _is_linear_block(LMis, LM0):
+            lp_blocks.append(([LMi.diagonal() for LMi in LMis],
+                              LM0.diagonal()))
+            continue
+        block_sizes.append(LM0.shape[0])
+        b = len(block_sizes)
+        _add(0, print_block(0, b, LM0, -1))
+        for x in range(nvars):
+            _add(x+1, print_block(x+1, b, LMis[x], 1))
+
+    if lp_blocks:
+        LPis, LP0 = _stack_linear_blocks(lp_blocks, nvars)
+        block_sizes.append(-len(LP0))
+        b = len(block_sizes)
+        _add(0, print_diag(0, b, LP0, -1))
+        for x in range(nvars):
+            _add(x+1, print_diag(x+1, b, LPis[x], 1))
+
+    return block_sizes, parts
+
+
+def _write_sdpa(obj_coeffs, lmi_coeffs, eq_coeffs, linear_cone, print_block,
+                print_diag, comment=None, file=None, sep=('', '')):
+    """Helper funtion formatting numerical LMIs (see _sdpa_blocks) and
+    writing them in SDPA files.
+
+    Since the header needs all block sizes and each matrix number comes
+    with all its blocks, formatted blocks are spooled to a temporary file
+    when a file is given, so that only one block is held in memory.
+    """
+    spool = tempfile.TemporaryFile() if file is not None else None
+    try:
+        block_sizes, parts = _sdpa_blocks(obj_coeffs, lmi_coeffs, eq_coeffs,
+                                          linear_cone, print_block,
+                                          print_diag, spool)
+        return _sdpa_output(_sdpa_header(obj_coeffs, block_sizes, comment),
+                            parts, file, sep, spool)
+    finally:
+        if spool is not None:
+            spool.close()
+
+
+def _eq_coeffs_to_triplets(A, b):
+    """Helper funtion yielding, for each equality `a*x = b`, the size and
+    triplets of the pair of 1x1 blocks `a*x - b >= 0` and `b - a*x >= 0`
+    (see _eq_coeffs_to_lmi_coeffs)."""
+    dense = A.toarray() if hasattr(A, 'toarray') else A
+    for r in range(dense.shape[0]):
+        for sign in [1, -1]:
+            triplets = [(k+1, 0, 0, sign*a) for k, a in enumerate(dense[r])
+                        if a != 0]
+            if b[r] != 0:
+                triplets.insert(0, (0, 0, 0, -sign*b[r]))
+            yield 1, triplets
+
+
+# bytes used while formatting one record of a CoeffStore: its value as a
+# numpy '<U32' string (128), its line as a Python string (about 90), its
+# share of the joined text and of the temporary index arrays
+_SDPA_RECORD_TEXT_BYTES = 320
+
+
+def _sdpa_sparse_from_store(obj_coeffs, store, comment, linear_cone, file):
+    """Helper funtion writing a CoeffStore in SDPA sparse format.
+
+    Records are read back one chunk at a time, in storage (block by block)
+    order, and each chunk is formatted in slices small enough for their
+    formatted text (about _SDPA_RECORD_TEXT_BYTES per record, against the 24
+    bytes of a stored record) to fit in the store's memory_budget.
+    """
+    block_sizes = []
+    block_map = zeros(len(store.block_sizes), dtype=int)
+    row_offset = zeros(len(store.block_sizes), dtype=int)
+    lp_size = 0
+    for b, size in enumerate(store.block_sizes):
+        if linear_cone and store.block_diagonal[b]:
+            block_map[b] = -1
+            row_offset[b] = lp_size
+            lp_size += size
+        else:
+            block_sizes.append(size)
+            block_map[b] = len(block_sizes)
+    if lp_size:
+        block_sizes.append(-lp_size)
+        block_map[block_map == -1] = len(block_sizes)
+
+    step = max(1, store.memory_budget // _SDPA_RECORD_TEXT_BYTES)
+
+    def _print_slices(chunk):
+        for start in range(0, len(chunk[0]), step):
+            mat, block, row, col, val = [a[start:start+step] for a in chunk]
+            vals = _format_floats(where(mat == 0, -val, val))
+            rows = row + row_offset[block] + 1
+            cols = col + row_offset[block] + 1
+            yield ''.join(['%d %d %d %d %s\n' % line for line in
+                           zip(mat, block_map[block], rows, cols, vals)])
+
+    def _print_chunks():
+        for chunk in store.iter_chunks():
+            yield _print_slices(chunk)
+
+    return _sdpa_output(_sdpa_header(obj_coeffs, block_sizes, comment),
+                        _print_chunks(), file)
+
+
 def to_sdpa_sparse(objective_func, lmis, variables, objective_type='minimize',
-                   split_blocks=True, comment=None):
-    """Put problem (objective and LMIs) into SDPA sparse format."""
-    obj_coeffs = objective_to_coeffs(objective_func, variables,
-                                     objective_type)
-    lmi_coeffs = lmi_to_coeffs(lmis, variables, split_blocks,
-                               sparse=(True if scipy else False))
+                   split_blocks=True, comment=None,
+                   eliminate_equalities=False, chordal_decomposition=False,
+                   linear_cone=False, file=None, out_of_core=False,
+                   memory_budget=64*2**20):
+    """Put problem (objective and LMIs) into SDPA sparse format.
+
+    LMIs are extracted and formatted one block at a time. If a writable
+    file object is given, the output is written to it in chunks and None is
+    returned, otherwise the output is returned as a string.
+    Linear equalities (sympy.Eq) in lmis are either eliminated (see
+    to_cvxopt) or, since SDPA has no equality constraints, written as pairs
+    of opposite 1x1 blocks. If eliminate_equalities is True, the pair of the
+    output (or None) and of the Reduction (see to_cvxopt) is returned. See
+    to_cvxopt for chordal_decomposition.
+    If linear_cone is True, 1x1 and diagonal blocks are merged into a single
+    trailing LP block (negative size in blockstruct).
+
+    If out_of_core is set (see lmi_to_coeffs), coefficients are first
+    extracted to disk, buffering at most memory_budget bytes, and then
+    read back sequentially; entries are then written block by block instead
+    of matrix number by matrix number. This mode does not support
+    eliminate_equalities nor chordal_decomposition.
+    """
+    if out_of_core:
+        if eliminate_equalities or chordal_decomposition:
+            raise ValueError('eliminate_equalities and chordal_decomposition '
+                             'are not supported with out_of_core')
+        lmis, eqs = split_constraints(lmis)
+        obj_coeffs = objective_to_coeffs(objective_func, variables,
+                                         objective_type)
+        store = lmi_to_coeffs(lmis, variables, split_blocks,
+                              out_of_core=out_of_core,
+                              memory_budget=memory_budget)
+        try:
+            if eqs:
+                for size, triplets in _eq_coeffs_to_triplets(
+                        *eq_to_coeffs(eqs, variables)):
+                    store.add_block(size, triplets)
+            return _sdpa_sparse_from_store(obj_coeffs, store, comment,
+                                           linear_cone, file)
+        finally:
+            store.close()
+
+    has_scipy = _optional_import('scipy.sparse') is not None
+    return _sdpa_sparse_from_coeffs(
+        *_problem_to_coeffs(objective_func, lmis, variables, objective_type,
+                            split_blocks, has_scipy, eliminate_equalities,
+                            chordal_decomposition),
+        comment=comment, linear_cone=linear_cone, file=file)
+
 
-    s = _sdpa_header(obj_coeffs, lmi_coeffs, comment)
+def _sdpa_sparse_from_coeffs(obj_coeffs, lmi_coeffs, eq_coeffs,
+                             reduction=None, comment=None, linear_cone=False,
+                             file=None):
+    """Helper funtion writing the output of _problem_to_coeffs in SDPA
+    sparse format (see to_sdpa_sparse)."""
+    has_scipy = _optional_import('scipy.sparse') is not None
 
-    if scipy:
+    def _print_diag(x, b, v, sign=1):
+        s = ''
+        for i in v.nonzero()[0]:
+            s += '%d %d %d %d %s\n' % (x, b, i+1, i+1, str(sign*v[i]))
+        return s
+
+    if has_scipy:
         def _print_sparse(x, b, m, sign=1):
             s = ''
             nzi, nzj = m.nonzero()
@@ -237,43 +1044,41 @@ def to_sdpa_sparse(objective_func, lmis, variables, objective_type='minimize',
                         s += '%d %d %d %d %s\n' % (x, b, i+1, j+1, str(e))
             return s
 
-    for b in range(len(lmi_coeffs)):
-        s += _print_sparse(0, b+1, lmi_coeffs[b][1], sign=-1)
-    for x in range(len(obj_coeffs)):
-        for b in range(len(lmi_coeffs)):
-            s += _print_sparse(x+1, b+1, lmi_coeffs[b][0][x])
-
-    return s
+    ret = _write_sdpa(obj_coeffs, lmi_coeffs, eq_coeffs, linear_cone,
+                      _print_sparse, _print_diag, comment, file)
+    if reduction is not None:
+        return ret, reduction
+    return ret
 
 
 def to_sdpa_dense(objective_func, lmis, variables, objective_type='minimize',
-                  split_blocks=True, comment=None):
-    """Put SDP problem (objective and LMIs) into SDPA dense format."""
-    obj_coeffs = objective_to_coeffs(objective_func, variables,
-                                     objective_type)
-    lmi_coeffs = lmi_to_coeffs(lmis, variables, split_blocks, sparse=False)
-
-    s = _sdpa_header(obj_coeffs, lmi_coeffs, comment)
-
-    def _print_dense(m, sign=1):
-        s = '\n {'
-        shape = m.shape
-        for i in range(shape[0]):
-            s += '\n  {'
-            for j in range(shape[1]):
-                s += ' ' + str(sign*m[i, j]) + ','
-            s = s[:-1] + ' },'
-        s = s[:-1] + '\n }'
-        return s
+                  split_blocks=True, comment=None,
+                  eliminate_equalities=False, chordal_decomposition=False,
+                  linear_cone=False, precision=None, file=None):
+    """Put SDP problem (objective and LMIs) into SDPA dense format.
 
-    s += '{'
-    for b in range(len(lmi_coeffs)):
-        s += _print_dense(lmi_coeffs[b][1], sign=-1)
-    s += '\n}\n'
-    for x in range(len(obj_coeffs)):
-        s += '{'
-        for b in range(len(lmi_coeffs)):
-            s += _print_dense(lmi_coeffs[b][0][x])
-        s += '\n}\n'
+    LMIs are extracted and formatted one block at a time, each block being
+    formatted at once with NumPy. Numbers are written with their shortest
+    round-trip representation, or with `precision` significant digits if
+    given. See to_sdpa_sparse for the file argument, for the handling of
+    linear equalities and of linear_cone, and to_cvxopt for
+    chordal_decomposition.
+    """
+    obj_coeffs, lmi_coeffs, eq_coeffs, reduction = _problem_to_coeffs(
+        objective_func, lmis, variables, objective_type, split_blocks,
+        False, eliminate_equalities, chordal_decomposition)
 
-    return s
+    def _print_diag(x, b, v, sign=1):
+        return '\n { ' + ', '.join(_format_floats(sign*v, precision)) + ' }'
+
+    def _print_dense(x, b, m, sign=1):
+        rows = _format_floats(sign*m, precision)
+        return '\n {' + ','.join(['\n  { ' + ', '.join(row) + ' }'
+                                  for row in rows]) + '\n }'
+
+    ret = _write_sdpa(obj_coeffs, lmi_coeffs, eq_coeffs, linear_cone,
+                      _print_dense, _print_diag, comment, file,
+                      sep=('{', '\n}\n'))
+    if reduction is not None:
+        return ret, reduction
+    return ret
@@ -0,0 +1,165 @@
+"""On-disk (out-of-core) storage of numerical LMI coefficients"""
+
+__all__ = ['CoeffStore']
+
+import os
+import shutil
+import tempfile
+
+from numpy import empty, memmap, dtype, concatenate, searchsorted, arange
+
+
+class CoeffStore(object):
+    """Numerical LMI coefficients stored on disk as triplets.
+
+    Each nonzero coefficient of the upper triangle of each block is stored as
+    a `(mat, block, row, col, val)` record, where `mat` is 0 for the constant
+    term and k for the k-th variable (the SDPA numbering). Records are kept
+    in memory in chunks of `chunk_size` records, sized from memory_budget
+    (in bytes), and appended to one raw file per field as each chunk fills
+    up. They are read back through numpy.memmap.
+
+    Blocks must be added in order, with add_block, and their records are
+    stored contiguously.
+
+    Parameters
+    ----------
+    nvars: int
+        Number of variables.
+    directory: string or None
+        Directory where the files are created. If None, a temporary
+        directory is created, and removed by close().
+    memory_budget: int
+        Approximate number of bytes used by the in-memory chunk.
+    """
+    fields = (('mat', 'int32'), ('block', 'int32'), ('row', 'int32'),
+              ('col', 'int32'), ('val', 'float64'))
+
+    def __init__(self, nvars, directory=None, memory_budget=64*2**20):
+        record_size = sum(dtype(t).itemsize for name, t in self.fields)
+        self.nvars = nvars
+        self.memory_budget = int(memory_budget)
+        self.chunk_size = max(1, self.memory_budget // record_size)
+        self.block_sizes = []
+        self.block_offsets = [0]
+        self.block_diagonal = []
+        self.size = 0
+
+        self._own_directory = directory is None
+        if directory is None:
+            directory = tempfile.mkdtemp(prefix='lmi_sdp_')
+        self.directory = directory
+        self._paths = dict((name, os.path.join(directory, name + '.bin'))
+                           for name, t in self.fields)
+        for name, t in self.fields:
+            open(self._paths[name], 'wb').close()
+        self._buffers = dict((name, empty(self.chunk_size, dtype=t))
+                             for name, t in self.fields)
+        self._fill = 0
+
+    def __len__(self):
+        return self.size
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def _flush(self):
+        """Append the in-memory chunk to the files."""
+        if self._fill:
+            for name, t in self.fields:
+                with open(self._paths[name], 'ab') as f:
+                    self._buffers[name][:self._fill].tofile(f)
+            self._fill = 0
+
+    def add_block(self, size, triplets):
+        """Append a block given by its size and an iterable of
+        `(mat, row, col, val)` upper triangle triplets (see
+        lmi_sdp.iter_lm_triplets)."""
+        b = len(self.block_sizes)
+        diagonal = True
+        buffers = self._buffers
+        for mat, row, col, val in triplets:
+            if self._fill == self.chunk_size:
+                self._flush()
+            n = self._fill
+            buffers['mat'][n] = mat
+            buffers['block'][n] = b
+            buffers['row'][n] = row
+            buffers['col'][n] = col
+            buffers['val'][n] = val
+            diagonal = diagonal and row == col
+            self._fill += 1
+            self.size += 1
+        self.block_sizes.append(size)
+        self.block_offsets.append(self.size)
+        self.block_diagonal.append(diagonal)
+
+    def arrays(self):
+        """Return the memory-mapped (read-only) arrays of each field, as a
+        dict."""
+        self._flush()
+        arrays = {}
+        for name, t in self.fields:
+            if self.size:
+                arrays[name] = memmap(self._paths[name], dtype=t, mode='r',
+                                      shape=(self.size,))
+            else:
+                arrays[name] = empty(0, dtype=t)
+        return arrays
+
+    def iter_chunks(self):
+        """Read the records back sequentially, one chunk at a time.
+
+        Yields
+        ------
+        (mat, block, row, col, val): tuple of numpy arrays
+        """
+        arrays = self.arrays()
+        for start in range(0, self.size, self.chunk_size):
+            stop = min(start + self.chunk_size, self.size)
+            yield tuple(arrays[name][start:stop] for name, t in self.fields)
+
+    def iter_blocks(self):
+        """Read the blocks back sequentially as numerical LMIs.
+
+        Yields
+        ------
+        (block_index, coeffs, const): tuple
+            As yielded by lmi_sdp.iter_lmi_coeffs with sparse=True
+            (scipy.sparse.csr_matrix matrices, both triangles filled in).
+        """
+        from scipy.sparse import coo_matrix
+        arrays = self.arrays()
+        for b, size in enumerate(self.block_sizes):
+            sl = slice(self.block_offsets[b], self.block_offsets[b+1])
+            order = arrays['mat'][sl].argsort(kind='mergesort')
+            mat = arrays['mat'][sl][order]
+            row = arrays['row'][sl][order]
+            col = arrays['col'][sl][order]
+            val = arrays['val'][sl][order]
+            bounds = searchsorted(mat, arange(self.nvars + 2))
+            mats = []
+            for k in range(self.nvars + 1):
+                r, c, v = [a[bounds[k]:bounds[k+1]] for a in (row, col, val)]
+                lower = r != c
+                mats.append(coo_matrix(
+                    (concatenate([v, v[lower]]),
+                     (concatenate([r, c[lower]]), concatenate([c, r[lower]]))),
+                    shape=(size, size)).tocsr())
+            yield b, mats[1:], mats[0]
+
+    def to_coeffs(self):
+        """Load all blocks into memory, as returned by
+        lmi_sdp.lmi_to_coeffs with sparse=True."""
+        return [(coeffs, const) for b, coeffs, const in self.iter_blocks()]
+
+    def close(self):
+        """Remove the files (and the directory if it was created here)."""
+        for path in self._paths.values():
+            if os.path.exists(path):
+                os.remove(path)
+        if self._own_directory:
+            shutil.rmtree(self.directory, ignore_errors=True)
@@ -0,0 +1,146 @@
+import asyncio
+
+from sympy import Matrix, Eq
+from sympy.abc import x, y, z
+
+from lmi_sdp import LMI_PSD, LMI_NSD, CoeffCache, ato_sdpa_sparse, \
+    to_sdpa_sparse
+
+
+def _problem():
+    lmis = [LMI_PSD(Matrix([[x + 1, y], [y, 2]])),
+            LMI_NSD(Matrix([[z - 1, 0], [0, x - 3]])),
+            Eq(x + y, 1)]
+    return x + 2*y - z, lmis, [x, y, z]
+
+
+def _run(coroutine):
+    loop = asyncio.new_event_loop()
+    try:
+        return loop.run_until_complete(coroutine)
+    finally:
+        loop.close()
+
+
+def test_ato_sdpa_sparse():
+    obj, lmis, vars = _problem()
+    cache = CoeffCache()
+    expected = to_sdpa_sparse(obj, lmis, vars, linear_cone=True)
+    dat = _run(ato_sdpa_sparse(obj, lmis, vars, linear_cone=True,
+                               cache=cache))
+    assert dat == expected
+    assert len(cache) == 3  # one block from the first LMI, two from second
+    dat = _run(ato_sdpa_sparse(obj, lmis, vars, linear_cone=True,
+                               cache=cache))
+    assert dat == expected
+    assert len(cache) == 3
+
+    dat, reduction = _run(ato_sdpa_sparse(obj, lmis, vars,
+                                          eliminate_equalities=True,
+                                          cache=None))
+    expected = to_sdpa_sparse(obj, lmis, vars, eliminate_equalities=True)
+    assert dat == expected[0]
+    assert reduction.x0.tolist() == expected[1].x0.tolist()
+    assert reduction.offset == expected[1].offset
+
+
+def test_ato_sdpa_sparse_process_pool():
+    from concurrent.futures import ProcessPoolExecutor
+    obj, lmis, vars = _problem()
+    executor = ProcessPoolExecutor(max_workers=1)
+    try:
+        dat = _run(ato_sdpa_sparse(obj, lmis, vars, executor=executor,
+                                   cache=CoeffCache()))
+    finally:
+        executor.shutdown()
+    assert dat == to_sdpa_sparse(obj, lmis, vars)
+
+
+def test_coeff_cache():
+    cache = CoeffCache(maxsize=2)
+    cache.put('a', 1)
+    cache.put('b', 2)
+    assert cache.get('a') == 1
+    cache.put('c', 3)
+    assert cache.get('b') is None
+    assert cache.get('a') == 1
+    assert len(cache) == 2
+    cache.clear()
+    assert len(cache) == 0
+
+    # bounded by the bytes of the cached arrays
+    from numpy import zeros
+    cache = CoeffCache(memory_budget=2000)
+    cache.put('a', ([zeros(100)], zeros(10)))
+    cache.put('b', ([zeros(100)], zeros(10)))
+    assert cache.nbytes == 1760
+    cache.put('c', ([zeros(40)], zeros(10)))
+    assert cache.get('a') is None
+    assert cache.nbytes == 1280
+    cache.put('d', ([zeros(300)], zeros(10)))  # larger than the budget
+    assert cache.get('d') is None
+    assert len(cache) == 2
+    cache.clear()
+    assert cache.nbytes == 0
+
+
+class _CancellingCache(CoeffCache):
+    """Cancels a task once the first block is stored."""
+
+    def put(self, key, value):
+        CoeffCache.put(self, key, value)
+        self.loop.call_soon_threadsafe(self.task.cancel)
+
+
+def test_ato_sdpa_sparse_cancel():
+    obj, lmis, vars = _problem()
+    loop = asyncio.new_event_loop()
+    cache = _CancellingCache()
+    cache.loop = loop
+    cache.task = loop.create_task(ato_sdpa_sparse(obj, lmis, vars,
+                                                  cache=cache))
+    try:
+        loop.run_until_complete(cache.task)
+    except asyncio.CancelledError:
+        pass
+    else:  # pragma: no cover
+        assert False, 'expected CancelledError'
+    finally:
+        loop.close()
+    assert len(cache) == 1
+
+
+try:
+    import scipy
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_cached_sparse_readonly():
+        obj, lmis, vars = _problem()
+        cache = CoeffCache()
+        _run(ato_sdpa_sparse(obj, lmis, vars, cache=cache))
+        for (coeffs, const), nbytes in cache._data.values():
+            for m in coeffs + [const]:
+                assert m.format == 'csr'
+                assert not m.data.flags.writeable
+                assert not m.indices.flags.writeable
+
+
+try:
+    import cvxopt
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_ato_cvxopt():
+        from lmi_sdp import ato_cvxopt, to_cvxopt
+        obj, lmis, vars = _problem()
+        expected = to_cvxopt(obj, lmis, vars)
+        ret = _run(ato_cvxopt(obj, lmis, vars, cache=CoeffCache()))
+        assert len(ret) == len(expected)
+        assert list(ret[0]) == list(expected[0])
+        for G, G_expected in zip(ret[1] + ret[2], expected[1] + expected[2]):
+            assert list(G) == list(G_expected)
+        assert list(ret[3]) == list(expected[3])
+        assert list(ret[4]) == list(expected[4])
@@ -0,0 +1,98 @@
+from sympy import Matrix, diag, kronecker_product
+from sympy.abc import x, y, z
+from numpy import array
+from numpy.testing import assert_allclose
+
+from lmi_sdp import lm_sym_to_coeffs, lm_bmat, lm_block_diag, \
+    lm_congruence, lm_kron, lm_transpose, lm_schur_complement
+
+vars = [x, y, z]
+M1 = Matrix([[x + 1, 2*y], [2*y, z - 3]])
+M2 = Matrix([[x - z, 1], [1, 4]])
+B = Matrix([[1, 0], [2, 3]])
+
+
+def _assert_lm_equal(lm, m):
+    expected = lm_sym_to_coeffs(m, vars)
+    for a, b in zip(lm[0] + [lm[1]], expected[0] + [expected[1]]):
+        a = a.toarray() if hasattr(a, 'toarray') else a
+        assert_allclose(a, b)
+
+
+def _lms(sparse):
+    return [lm_sym_to_coeffs(M, vars, sparse=sparse) for M in (M1, M2)]
+
+
+def test_lm_bmat():
+    for sparse in _sparse_options:
+        L1, L2 = _lms(sparse)
+        Bn = array(B).astype(float)
+        lm = lm_bmat([[L1, Bn], [Bn.T, L2]])
+        _assert_lm_equal(lm, Matrix.vstack(Matrix.hstack(M1, B),
+                                           Matrix.hstack(B.T, M2)))
+        lm = lm_bmat([[L1, None], [None, L2]])
+        _assert_lm_equal(lm, diag(M1, M2))
+        _assert_lm_equal(lm_block_diag([L1, L2, L1]), diag(M1, M2, M1))
+        _assert_lm_equal(lm_transpose(lm_bmat([[L1, L2]])),
+                         Matrix.hstack(M1, M2).T)
+
+    except_ok = False
+    try:
+        lm_bmat([[L1, ([], array([[1.]]))]])
+    except ValueError:
+        except_ok = True
+    assert except_ok
+
+    except_ok = False
+    try:
+        lm_bmat([[array([[1.]]), None], [None, array([[2.]])]])
+    except ValueError:
+        except_ok = True
+    assert except_ok
+
+
+def test_lm_congruence_kron():
+    T = Matrix([[1, 2, 0], [0, 1, -1]])
+    A = Matrix([[2, 1], [1, 0]])
+    for sparse in _sparse_options:
+        L1, L2 = _lms(sparse)
+        lm = lm_congruence(L1, array(T).astype(float))
+        _assert_lm_equal(lm, T.T*M1*T)
+        lm = lm_kron(L1, array(A).astype(float))
+        _assert_lm_equal(lm, kronecker_product(M1, A))
+        lm = lm_kron(L1, array(A).astype(float), left=True)
+        _assert_lm_equal(lm, kronecker_product(A, M1))
+
+
+def test_lm_schur_complement():
+    C = Matrix([[2, 1], [1, 3]])
+    for sparse in _sparse_options:
+        L1, L2 = _lms(sparse)
+        Bn, Cn = array(B).astype(float), array(C).astype(float)
+        lm = lm_schur_complement(lm_bmat([[L1, Bn], [Bn.T, Cn]]), 2)
+        _assert_lm_equal(lm, M1 - B*C.inv()*B.T)
+
+        except_ok = False
+        try:
+            lm_schur_complement(lm_bmat([[L1, Bn], [Bn.T, L2]]), 2)
+        except ValueError:
+            except_ok = True
+        assert except_ok
+
+
+try:
+    import scipy
+except ImportError:  # pragma: no cover
+    _sparse_options = [False]
+else:
+    _sparse_options = [False, True]
+
+    def test_lm_bmat_sparse_constant_blocks():
+        L1 = lm_sym_to_coeffs(M1, vars, sparse=True)
+        Bn = array(B).astype(float)
+        coeffs, const = lm_bmat([[L1, Bn], [Bn.T, None]])
+        assert all(m.format == 'csr' for m in coeffs + [const])
+        assert [m.nnz for m in coeffs] == [1, 2, 1]
+        _assert_lm_equal((coeffs, const),
+                         Matrix.vstack(Matrix.hstack(M1, B),
+                                       Matrix.hstack(B.T, Matrix.zeros(2, 2))))
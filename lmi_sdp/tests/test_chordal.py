@@ -0,0 +1,106 @@
+from sympy import Matrix, symbols
+from numpy import array, eye, zeros
+from numpy.testing import assert_array_equal
+
+from lmi_sdp import LMI_PSD, aggregate_sparsity, chordal_cliques, \
+    chordal_decomposition, lmi_to_coeffs, to_sdpa_sparse
+
+
+def test_aggregate_sparsity():
+    coeffs = [array([[0., 1.], [1., 0.]]), zeros((2, 2))]
+    const = zeros((2, 2))
+    assert_array_equal(aggregate_sparsity(coeffs, const),
+                       array([[True, True], [True, True]]))
+    assert_array_equal(aggregate_sparsity([zeros((2, 2))], const), eye(2))
+
+
+def test_chordal_cliques():
+    # 4-cycle needs one fill edge
+    pattern = array([[1, 1, 0, 1],
+                     [1, 1, 1, 0],
+                     [0, 1, 1, 1],
+                     [1, 0, 1, 1]])
+    cliques = chordal_cliques(pattern)
+    assert len(cliques) == 2
+    assert all(len(c) == 3 for c in cliques)
+
+    assert chordal_cliques(eye(3)) == [[0], [1], [2]]
+
+
+def _tridiagonal_lmi():
+    x = symbols('x0:4')
+    m = Matrix(4, 4, lambda i, j: x[i] + 1 if i == j else
+               (x[min(i, j)] if abs(i - j) == 1 else 0))
+    return LMI_PSD(m), x
+
+
+def test_chordal_decomposition():
+    lmi, x = _tridiagonal_lmi()
+    coeffs = lmi_to_coeffs(lmi, x)
+
+    decomposed, n_coupling = chordal_decomposition(coeffs)
+    assert n_coupling == 2
+    assert len(decomposed) == 3
+    for block_coeffs, block_const in decomposed:
+        assert block_const.shape == (2, 2)
+        assert len(block_coeffs) == 4 + n_coupling
+
+    # summing clique blocks back in place recovers the original LMI for any
+    # value of the coupling variables
+    cliques = chordal_cliques(aggregate_sparsity(*coeffs[0]))
+    for v in range(4 + n_coupling):
+        total = zeros((4, 4))
+        for c, (block_coeffs, block_const) in zip(cliques, decomposed):
+            total[array(c)[:, None], array(c)] += block_coeffs[v]
+        expected = coeffs[0][0][v] if v < 4 else zeros((4, 4))
+        assert_array_equal(total, expected)
+
+    # variables and couplings absent from a clique share one read-only zero
+    # matrix
+    block_coeffs, block_const = decomposed[0]
+    absent = [m for m in block_coeffs if not m.any()]
+    assert len(absent) == 3
+    assert all(m is absent[0] for m in absent)
+    assert not absent[0].flags.writeable
+
+
+def test_chordal_decomposition_unchanged():
+    x, y = symbols('x y')
+    coeffs = lmi_to_coeffs(LMI_PSD(Matrix([[x, y], [y, 1]])), [x, y])
+    decomposed, n_coupling = chordal_decomposition(coeffs)
+    assert n_coupling == 0
+    assert_array_equal(decomposed[0][1], coeffs[0][1])
+
+
+def test_to_sdpa_sparse_chordal():
+    lmi, x = _tridiagonal_lmi()
+    dat = to_sdpa_sparse(sum(x), lmi, x, split_blocks=False,
+                         chordal_decomposition=True)
+    lines = dat.splitlines()
+    assert lines[0] == '6 = ndim'
+    assert lines[1] == '3 = nblocks'
+    assert lines[2] == '2 2 2 = blockstruct'
+    assert lines[3] == '1.0, 1.0, 1.0, 1.0, 0.0, 0.0 = objcoeffs'
+
+
+try:
+    import cvxopt
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_to_cvxopt_chordal():
+        from cvxopt import solvers
+        from lmi_sdp import to_cvxopt
+        solvers.options['show_progress'] = False
+
+        lmi, x = _tridiagonal_lmi()
+        obj = x[0] + 2*x[1] + 3*x[2] + x[3]
+        c, Gs, hs = to_cvxopt(obj, lmi, x, split_blocks=False)
+        sol = solvers.sdp(c, Gs=Gs, hs=hs)
+        c, Gs, hs = to_cvxopt(obj, lmi, x, split_blocks=False,
+                              chordal_decomposition=True)
+        assert len(Gs) == 3
+        sol_dec = solvers.sdp(c, Gs=Gs, hs=hs)
+        assert abs(sol['primal objective'] -
+                   sol_dec['primal objective']) < 1e-6
@@ -0,0 +1,98 @@
+from sympy import Matrix, symbols, sin
+from numpy import array
+from numpy.testing import assert_allclose
+
+from lmi_sdp import LMI_PSD, LMI_NSD, lmi_to_coeffs, lmi_grid_coeffs, \
+    to_sdpa_sparse, NonLinearMatrixError
+
+x1, x2, x3 = variables = symbols('x1:4')
+p, q = parameters = symbols('p q')
+lmis = [LMI_PSD(Matrix([[x1 + p*x2, q], [q, x2 - p**2*q + 2]])),
+        LMI_NSD(Matrix([[p*q*x3 - 1, 0], [0, x1 - 3]]))]
+points = array([[0., 1.], [1., 2.], [-2., 0.5], [3., -1.]])
+
+
+def _subs(point):
+    return [lmi.subs(dict(zip(parameters, point))) for lmi in lmis]
+
+
+def test_lmi_grid_coeffs():
+    for split_blocks in [False, True]:
+        grid = lmi_grid_coeffs(lmis, variables, parameters, points,
+                               split_blocks=split_blocks)
+        assert len(grid) == len(points)
+        nblocks = len(grid.block_sizes)
+        assert nblocks == (3 if split_blocks else 2)
+        for sparse in _sparse_options:
+            all_coeffs = grid.lmi_coeffs(sparse=sparse)
+            assert len(all_coeffs) == nblocks * len(points)
+            for t, point in enumerate(points):
+                expected = lmi_to_coeffs(_subs(point), variables,
+                                         split_blocks=split_blocks)
+                actual = grid.lmi_coeffs(point=t, sparse=sparse)
+                assert len(actual) == nblocks
+                for (coeffs, const), (e_coeffs, e_const) in zip(
+                        actual, expected):
+                    for m, e in zip(coeffs + [const], e_coeffs + [e_const]):
+                        if sparse:
+                            m = m.toarray()
+                        assert_allclose(m, e)
+
+
+def test_lmi_grid_coeffs_single_parameter():
+    lmi = LMI_PSD(Matrix([[p*x1, 1], [1, x2 + p**3]]))
+    grid = lmi_grid_coeffs(lmi, [x1, x2], [p], [1., 2.])
+    (coeffs, const), = grid.lmi_coeffs(point=1)
+    assert_allclose(coeffs[0], [[2., 0.], [0., 0.]])
+    assert_allclose(const, [[0., 1.], [1., 8.]])
+
+
+def test_lmi_grid_coeffs_errors():
+    for args in [([lmis, variables, parameters, points[:, :1]], ValueError),
+                 ([lmis, variables, [p, x1], points], ValueError),
+                 ([LMI_PSD(Matrix([[p*x1*x2]])), variables, parameters,
+                   points], NonLinearMatrixError),
+                 ([LMI_PSD(Matrix([[sin(p)*x1]])), variables, parameters,
+                   points], NonLinearMatrixError)]:
+        except_ok = False
+        try:
+            lmi_grid_coeffs(*args[0])
+        except args[1]:
+            except_ok = True
+        assert except_ok
+
+
+def test_grid_to_sdpa_sparse():
+    obj = x1 + 2*x3
+    grid = lmi_grid_coeffs(lmis, variables, parameters, points)
+    expected = to_sdpa_sparse(obj, sum([_subs(pt) for pt in points], []),
+                              variables, split_blocks=False)
+    assert grid.to_sdpa_sparse(obj, variables) == expected
+
+
+try:
+    import scipy
+except ImportError:  # pragma: no cover
+    _sparse_options = [False]
+else:
+    _sparse_options = [False, True]
+
+try:
+    import cvxopt
+except ImportError:  # pragma: no cover
+    pass
+else:
+    from lmi_sdp import to_cvxopt
+
+    def test_grid_to_cvxopt():
+        obj = x1 + 2*x3
+        grid = lmi_grid_coeffs(lmis, variables, parameters, points)
+        c, Gs, hs = grid.to_cvxopt(obj, variables)
+        e_c, e_Gs, e_hs = to_cvxopt(obj, sum([_subs(pt) for pt in points],
+                                             []), variables,
+                                    split_blocks=False)
+        assert list(c) == list(e_c)
+        assert len(Gs) == len(e_Gs) == 2 * len(points)
+        for G, e_G, h, e_h in zip(Gs, e_Gs, hs, e_hs):
+            assert_allclose(array(G), array(e_G))
+            assert_allclose(array(h), array(e_h))
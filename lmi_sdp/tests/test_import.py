@@ -0,0 +1,39 @@
+import subprocess
+import sys
+
+from lmi_sdp.lmi import _version_tuple
+
+
+def test_version_tuple():
+    assert _version_tuple('0.7.6') == (0, 7, 6)
+    assert _version_tuple('1.13.0rc2') == (1, 13, 0)
+    assert _version_tuple('1.5.1.dev') >= (0, 7, 6)
+    assert _version_tuple('0.7.4') < (0, 7, 6)
+
+
+def test_import_is_lightweight():
+    code = ('import sys, lmi_sdp; '
+            'print(" ".join(m for m in ("scipy", "cvxopt", "packaging") '
+            'if m in sys.modules))')
+    out = subprocess.check_output([sys.executable, '-c', code])
+    assert out.decode().strip() == ''
+
+
+def test_star_import_keeps_sympy_names():
+    import sympy
+    namespace = {}
+    exec('from sympy import *\nfrom lmi_sdp import *', namespace)
+    for name in ['re', 'sqrt', 'solve']:
+        assert namespace[name] is getattr(sympy, name)
+
+
+def test_star_import_exports_no_numpy_names():
+    import numpy
+    for module in ['chordal', 'storage', 'operators', 'scaling', 'results',
+                   'aio', 'lowrank', 'algebra', 'report', 'grid']:
+        namespace = {}
+        exec('from lmi_sdp.%s import *' % module, namespace)
+        leaked = [name for name, obj in namespace.items()
+                  if not name.startswith('_') and
+                  getattr(numpy, name, None) is obj]
+        assert leaked == [], module
@@ -1,4 +1,4 @@
-from sympy import Matrix, zeros, MatAdd, MatMul
+from sympy import Matrix, ImmutableSparseMatrix, zeros, MatAdd, MatMul
 from sympy.abc import x, y, z
 import numpy as np
 from lmi_sdp import NonLinearExpressionError, NonLinearMatrixError, \
@@ -61,6 +61,38 @@ else:
                 np.array([[0.0, 0.0], [0.0, 1.0]])).all()
         assert (coeffs[1].toarray() == np.array([[1.2, 0.0], [0.0, 1.2]])).all()
 
+    def test_lm_sym_to_coeffs_poly_sparse():
+        m = Matrix([[1.2, x], [x, 2*(x + 1)*(y - 3) - 2*x*y + z/3]])
+        expr_coeffs = lm_sym_to_coeffs(m, [x, y, z], sparse=True)
+        poly_coeffs = lm_sym_to_coeffs(m, [x, y, z], sparse=True,
+                                       backend='poly')
+        assert poly_coeffs[1].format == 'lil'
+        for a, b in zip(expr_coeffs[0] + [expr_coeffs[1]],
+                        poly_coeffs[0] + [poly_coeffs[1]]):
+            assert np.allclose(a.toarray(), b.toarray())
+
+
+def test_lm_sym_to_coeffs_poly():
+    m = Matrix([[1.2, x], [3.4*y, 1.2 + 3*x - 4.5*y + z]])
+    coeffs = lm_sym_to_coeffs(m, [x, y, z], backend='poly')
+    assert (coeffs[0][0] == np.array([[0.0, 1.0], [0.0, 3.0]])).all()
+    assert (coeffs[0][1] == np.array([[0.0, 0.0], [3.4, -4.5]])).all()
+    assert (coeffs[0][2] == np.array([[0.0, 0.0], [0.0, 1.0]])).all()
+    assert (coeffs[1] == np.array([[1.2, 0.0], [0.0, 1.2]])).all()
+
+    # not expanded, with a cancelling nonlinear term
+    m = Matrix([[2*(x + 1)*(y - 3) - 2*x*y, 0], [0, (z + 1)/4]])
+    coeffs = lm_sym_to_coeffs(m, [x, y, z], backend='poly')
+    assert np.allclose(coeffs[0][0], [[-6.0, 0.0], [0.0, 0.0]])
+    assert np.allclose(coeffs[0][1], [[2.0, 0.0], [0.0, 0.0]])
+    assert np.allclose(coeffs[0][2], [[0.0, 0.0], [0.0, 0.25]])
+    assert np.allclose(coeffs[1], [[-6.0, 0.0], [0.0, 0.25]])
+
+    assert lm_sym_to_coeffs(Matrix([0.0]), [x, y], backend='poly') == \
+        ([np.array([[0.0]]), np.array([[0.0]])], np.array([[0.0]]))
+    assert (lm_sym_to_coeffs(MatAdd(Matrix([[x]]), Matrix([[1]])), [x],
+                             backend='poly')[1] == np.array([[1.0]])).all()
+
 
 def test_lm_sym_to_coeffs_exceptions():
     except_ok = False
@@ -77,6 +109,21 @@ def test_lm_sym_to_coeffs_exceptions():
         except_ok = True
     assert except_ok
 
+    for m in [Matrix([1.2 + x + y*z]), Matrix([x**2]), Matrix([1/x])]:
+        except_ok = False
+        try:
+            lm_sym_to_coeffs(m, [x, y, z], backend='poly')
+        except NonLinearMatrixError:
+            except_ok = True
+        assert except_ok
+
+    except_ok = False
+    try:
+        lm_sym_to_coeffs(Matrix([x]), [x], backend='unknown')
+    except ValueError:
+        except_ok = True
+    assert except_ok
+
 
 def test_lm_coeffs_to_sym():
     var_coeffs = [None]*3
@@ -88,6 +135,32 @@ def test_lm_coeffs_to_sym():
     m = Matrix([[1.2, x], [3.4*y, 1.2 + 3*x - 4.5*y + z]])
     assert lm_coeffs_to_sym(coeffs, [x, y, z]) - m == zeros(2)
 
+    sm = lm_coeffs_to_sym(coeffs, [x, y, z], sparse=True)
+    assert isinstance(sm, ImmutableSparseMatrix)
+    assert sm - m == zeros(2)
+
+try:
+    import scipy
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_lm_coeffs_to_sym_sparse():
+        m = Matrix([[1.2, x], [3.4*y, 1.2 + 3*x - 4.5*y + z]])
+        coeffs = lm_sym_to_coeffs(m, [x, y, z], sparse=True)
+        assert lm_coeffs_to_sym(coeffs, [x, y, z]) - m == zeros(2)
+
+try:
+    import cvxopt
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_lm_coeffs_to_sym_cvxopt():
+        m = Matrix([[1.2, x], [3.4*y, 1.2 + 3*x - 4.5*y + z]])
+        coeffs = lm_sym_to_coeffs(m, [x, y, z], sparse='cvxopt')
+        assert lm_coeffs_to_sym(coeffs, [x, y, z]) - m == zeros(2)
+
 
 def test_lm_sym_expanded():
     m = Matrix([[0, x], [3.4*y, 3*x - 4.5*y + z]])
@@ -99,3 +172,17 @@ def test_lm_sym_expanded():
     assert MatAdd(cx, cy, cz, cc) == lm_sym_expanded(m+c, [x, y, z])
     assert MatAdd(cx, cy, cz) == lm_sym_expanded(m, [x, y, z])
     assert cc == lm_sym_expanded(c, [x, y, z])
+
+    cx = MatMul(Matrix([[0.0, 1.0], [0.0, 3.0]]), x)
+    assert MatAdd(cx, cc) == lm_sym_expanded(Matrix([[0, x], [0, 3*x]]) + c,
+                                             [x, y, z])
+
+    sparse_expanded = lm_sym_expanded(m, [x, y, z], sparse=True)
+    assert all(isinstance(term.args[0], ImmutableSparseMatrix)
+               for term in sparse_expanded.args)
+    assert sparse_expanded.as_explicit() - m == zeros(2)
+
+    sparse_expanded = lm_sym_expanded(m + c, [x, y, z], sparse=True)
+    assert len(sparse_expanded.args) == 4
+    assert isinstance(sparse_expanded.args[-1], ImmutableSparseMatrix)
+    assert Matrix(sparse_expanded.args[-1]) == c
@@ -0,0 +1,61 @@
+from sympy import Matrix, symbols
+from numpy import eye, outer, zeros, diag
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+
+from lmi_sdp import LMI_PSD, lmi_to_coeffs, low_rank_factor, \
+    low_rank_coeffs
+
+
+def _assert_factor(m, rank):
+    U, d = low_rank_factor(m)
+    assert len(d) == rank
+    m = m.toarray() if hasattr(m, 'toarray') else m
+    assert_allclose(U.dot(diag(d)).dot(U.T), m, atol=1e-12)
+
+
+def test_low_rank_factor():
+    rs = RandomState(0)
+    b, c = rs.randn(5), rs.randn(5)
+    _assert_factor(outer(b, b), 1)
+    _assert_factor(outer(b, c) + outer(c, b), 2)
+    e = zeros((5, 5))
+    e[1, 3] = e[3, 1] = 1.
+    _assert_factor(e, 2)
+    _assert_factor(zeros((5, 5)), 0)
+    assert low_rank_factor(eye(5)) is None
+    assert low_rank_factor(outer(b, b) + outer(c, c) + 1e-3*eye(5)) is None
+    U, d = low_rank_factor(eye(5), max_rank=5)
+    assert_allclose(U.dot(diag(d)).dot(U.T), eye(5), atol=1e-12)
+
+
+def _lowrank_problem():
+    x = symbols('x1:4')
+    b = Matrix([1, 2, 3])
+    m = Matrix([[x[0], x[1], 0], [x[1], 1, 0], [0, 0, 2]]) + x[2]*b*b.T
+    return x[0] + x[1], [LMI_PSD(m)], x
+
+
+def test_low_rank_coeffs():
+    obj, lmis, x = _lowrank_problem()
+    factors = low_rank_coeffs(lmi_to_coeffs(lmis, x))
+    coeff_factors, const_factor = factors[0]
+    assert [len(f[1]) for f in coeff_factors] == [1, 2, 1]
+    assert const_factor[1].round(6).tolist() == [1.0, 2.0]
+
+
+try:
+    import scipy
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_low_rank_factor_sparse():
+        from scipy.sparse import lil_matrix
+        rs = RandomState(1)
+        b, c = rs.randn(6), rs.randn(6)
+        _assert_factor(lil_matrix(outer(b, c) + outer(c, b)), 2)
+        assert low_rank_factor(lil_matrix(eye(6))) is None
+        obj, lmis, x = _lowrank_problem()
+        factors = low_rank_coeffs(lmi_to_coeffs(lmis, x, sparse=True))
+        assert [len(f[1]) for f in factors[0][0]] == [1, 2, 1]
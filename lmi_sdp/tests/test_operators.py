@@ -0,0 +1,67 @@
+from sympy import Matrix, symbols
+from numpy import array, trace, eye
+from numpy.random import RandomState
+from numpy.testing import assert_allclose
+
+from lmi_sdp import LMI_PSD, lmi_to_coeffs, svec, smat
+
+
+def test_svec_smat():
+    m = array([[1., 2., 0.], [2., 3., -1.], [0., -1., 5.]])
+    n = array([[2., 1., 1.], [1., 0., 4.], [1., 4., -2.]])
+    assert_allclose(svec(m).dot(svec(n)), trace(m.dot(n)))
+    assert_allclose(smat(svec(m), 3), m)
+
+
+def _random_lmis():
+    x = symbols('x1:5')
+    dense = Matrix([[x[0] + 1, x[1], 0], [x[1], x[0] - x[2], 3],
+                    [0, 3, x[2] + 2]])
+    sparse = Matrix([[x[3], 0, 0, 0], [0, 1, 0, 2*x[1]], [0, 0, x[3], 0],
+                     [0, 2*x[1], 0, x[1]]])
+    return [LMI_PSD(dense), LMI_PSD(sparse)], x
+
+
+def _random_psd(rs, n):
+    m = rs.randn(n, n)
+    return m.dot(m.T) + eye(n)
+
+
+try:
+    import scipy
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_lmi_operator():
+        from lmi_sdp import LMIOperator
+        lmis, x = _random_lmis()
+        rs = RandomState(0)
+        for sparse in (False, True):
+            coeffs = lmi_to_coeffs(lmis, x, sparse=sparse)
+            dense = lmi_to_coeffs(lmis, x)
+            op = LMIOperator(coeffs)
+            assert op.nvars == 4
+            assert op.block_sizes == [3, 4]
+
+            X = [_random_psd(rs, 3), _random_psd(rs, 4)]
+            expected = [sum(trace(F[i].dot(Xb)) for (F, F0), Xb
+                            in zip(dense, X)) for i in range(4)]
+            assert_allclose(op.apply(X), expected)
+
+            y = rs.randn(4)
+            Z = op.adjoint(y)
+            for (F, F0), Zb in zip(dense, Z):
+                assert_allclose(Zb, sum(yi*Fi for yi, Fi in zip(y, F)))
+            # <A(X), y> == <X, A*(y)>
+            assert_allclose(op.apply(X).dot(y),
+                            sum(trace(Xb.dot(Zb)) for Xb, Zb in zip(X, Z)))
+
+            S = [_random_psd(rs, 3), _random_psd(rs, 4)]
+            T = [_random_psd(rs, 3), _random_psd(rs, 4)]
+            for args in ((S,), (S, T)):
+                Sb, Tb = args[0], args[-1]
+                expected = [[sum(trace(F[i].dot(Sb[b]).dot(F[j]).dot(Tb[b]))
+                                 for b, (F, F0) in enumerate(dense))
+                             for j in range(4)] for i in range(4)]
+                assert_allclose(op.schur(*args), expected)
@@ -0,0 +1,58 @@
+from sympy import Matrix, symbols, Eq
+from numpy.testing import assert_array_equal
+
+from lmi_sdp import LMI_PSD, LMI_NSD, lmi_to_coeffs, structure_report, \
+    lmi_structure_report
+
+
+def _lmis():
+    x = symbols('x1:5')
+    m1 = Matrix([[x[0] + 1, x[1], 0], [x[1], 2, 0], [0, 0, x[2]]])
+    m2 = Matrix([[x[3] - 1, 2*(x[2] + 1)], [2*(x[2] + 1), x[3]]])
+    return [LMI_PSD(m1), LMI_NSD(m2)], x
+
+
+def test_structure_report():
+    lmis, x = _lmis()
+    report = structure_report(lmi_to_coeffs(lmis, x, split_blocks=True))
+    assert report['nvars'] == 4
+    assert report['block_sizes'] == [2, 1, 2]
+    assert report['total_size'] == 5
+    assert report['coeff_nnz'].tolist() == [[2, 1, 2, 0, 0],
+                                            [0, 0, 0, 1, 0],
+                                            [3, 0, 0, 2, 2]]
+    assert report['var_nnz'].tolist() == [1, 2, 3, 2]
+    assert report['aggregate_nnz'].tolist() == [4, 1, 4]
+    assert report['vars_per_block'].tolist() == [2, 1, 2]
+    assert report['blocks_per_var'].tolist() == [1, 1, 2, 1]
+    # x1-x2 and x3-x4 are coupled
+    assert report['schur_nnz'] == 4 + 2 + 2
+    assert report['schur_density'] == 8 / 16.
+
+    sparse = structure_report(lmi_to_coeffs(lmis, x, split_blocks=True,
+                                            sparse=True))
+    for key in ('coeff_nnz', 'aggregate_nnz', 'incidence', 'block_density'):
+        assert_array_equal(sparse[key], report[key])
+
+
+def test_lmi_structure_report():
+    lmis, x = _lmis()
+    for split_blocks in (False, True):
+        report = structure_report(lmi_to_coeffs(lmis, x, split_blocks))
+        pattern = lmi_structure_report(lmis, x, split_blocks)
+        assert pattern['block_sizes'] == report['block_sizes']
+        assert_array_equal(pattern['incidence'], report['incidence'])
+        assert pattern['schur_nnz'] == report['schur_nnz']
+        assert_array_equal(pattern['coeff_nnz'], report['coeff_nnz'])
+
+    # equalities are skipped
+    pattern = lmi_structure_report([Eq(x[0], x[1])] + lmis, x)
+    report = lmi_structure_report(lmis, x)
+    assert pattern['block_sizes'] == report['block_sizes']
+    assert_array_equal(pattern['coeff_nnz'], report['coeff_nnz'])
+
+    # without expanding, cancelling terms are still counted
+    t = symbols('t')
+    pattern = lmi_structure_report(LMI_PSD(Matrix([[t - t*(t + 1) + t**2]])),
+                                   [t])
+    assert pattern['coeff_nnz'].tolist() == [[0, 1]]
@@ -0,0 +1,78 @@
+from sympy import Matrix, BlockDiagMatrix, Eq
+from sympy.abc import x, y, z
+from numpy import array, diag
+from numpy.linalg import eigvalsh
+from numpy.testing import assert_allclose
+
+from lmi_sdp import LMI_PSD, LMI_NSD, LMIResults, lmi_to_coeffs
+
+
+def _lmis():
+    m1 = Matrix([[x + 1, y, 0, 0], [y, 2, 0, 0], [0, 0, z, 0],
+                 [0, 0, 0, x - z + 3]])
+    m2 = Matrix([[x - 1, y], [y, -z]])
+    return [LMI_PSD(m1), LMI_NSD(m2)], [x, y, z]
+
+
+def test_lmi_results():
+    lmis, vars = _lmis()
+    sol = [0.5, -1., -0.5]
+    subs = dict(zip(vars, sol))
+    expected = [array(lmi.canonical().gts.subs(subs)).astype(float)
+                for lmi in lmis]
+
+    for sparse in (False, True):
+        res = LMIResults.from_lmis(lmis, vars, sol, sparse=sparse)
+        assert res.lmi_index == [0, 0, 0, 1]
+        assert [len(blocks) for blocks in res.slack_blocks] == [3, 1]
+        for S, F in zip(res.slacks, expected):
+            assert_allclose(S, F)
+        for ev, F in zip(res.eigenvalues, expected):
+            assert_allclose(ev, eigvalsh(F))
+        assert_allclose(res.min_eigenvalues,
+                        [eigvalsh(F).min() for F in expected])
+        assert not res.is_feasible()
+        assert res.duals is None
+
+    # without split blocks, each numerical LMI is an LMI
+    res = LMIResults(lmi_to_coeffs(lmis, vars), sol)
+    assert res.lmi_index == [0, 1]
+    assert_allclose(res.slacks[0], expected[0])
+
+    # already extracted split blocks, with their LMI index
+    coeffs, lmi_index = lmi_to_coeffs(lmis, vars, split_blocks=True,
+                                      return_index=True)
+    assert lmi_index == [0, 0, 0, 1]
+    res = LMIResults(coeffs, sol, lmi_index)
+    for S, F in zip(res.slacks, expected):
+        assert_allclose(S, F)
+
+    duals = [array([[1., 0.5], [0.5, 1.]]), array([[2.]]), array([[3.]]),
+             array([[4., 0.], [0., 4.]])]
+    res = LMIResults.from_lmis(lmis, vars, sol, duals=duals)
+    assert_allclose(res.duals[0][:2, :2], duals[0])
+    assert_allclose(diag(res.duals[0])[2:], [2., 3.])
+    assert_allclose(res.duals[1], duals[3])
+
+
+def test_lmi_results_block_diag_matrix():
+    m = BlockDiagMatrix(Matrix([[x]]), Matrix([[y, 1], [1, y]]))
+    res = LMIResults.from_lmis(LMI_PSD(m), [x, y], [1., 2.],
+                               split_blocks='BlockDiagMatrix')
+    assert res.lmi_index == [0, 0]
+    assert_allclose(res.slacks[0], [[1., 0., 0.], [0., 2., 1.],
+                                    [0., 1., 2.]])
+    assert res.is_feasible()
+
+
+def test_lmi_results_equalities():
+    lmis, vars = _lmis()
+    sol = [0.5, -1., -0.5]
+    constraints = [Eq(x, 2*y + 2.5), lmis[0], Eq(z, -0.5), lmis[1]]
+    res = LMIResults.from_lmis(constraints, vars, sol)
+    expected = LMIResults.from_lmis(lmis, vars, sol)
+    assert res.lmi_index == [1, 1, 1, 3]
+    assert res.positions == [1, 3]
+    for S, F in zip(res.slacks, expected.slacks):
+        assert_allclose(S, F)
+    assert_allclose(res.min_eigenvalues, expected.min_eigenvalues)
@@ -0,0 +1,84 @@
+from sympy import Matrix, Eq, symbols
+from numpy import array, outer
+from numpy.testing import assert_allclose
+
+from lmi_sdp import LMI_PSD, equilibrate, lmi_to_coeffs, objective_to_coeffs
+
+
+def _badly_scaled_problem():
+    x = symbols('x1:4')
+    lmis = [LMI_PSD(Matrix([[1e4*x[0] + 1, 1e-3*x[1]],
+                            [1e-3*x[1], 1e-5*x[2] + 2]])),
+            LMI_PSD(Matrix([[1e3*x[1] + 1e2]])),
+            LMI_PSD(Matrix([[1e-4*x[0] + 1e-4*x[2] + 1]]))]
+    obj = 1e2*x[0] + x[1] + 1e-2*x[2]
+    return obj, lmis, x
+
+
+def test_equilibrate():
+    obj, lmis, x = _badly_scaled_problem()
+    obj_coeffs = objective_to_coeffs(obj, x)
+    for sparse in (False, True):
+        lmi_coeffs = lmi_to_coeffs(lmis, x, sparse=sparse)
+        obj_s, lmi_s, scaling = equilibrate(obj_coeffs, lmi_coeffs)
+        d = scaling.variable_scale
+        assert_allclose(obj_s, d * obj_coeffs)
+        for (F, F0), (Fs, F0s), e in zip(lmi_coeffs, lmi_s,
+                                         scaling.block_scales):
+            if sparse:
+                F, F0 = [m.toarray() for m in F], F0.toarray()
+                Fs, F0s = [m.toarray() for m in Fs], F0s.toarray()
+            assert_allclose(F0s, outer(e, e) * F0)
+            for k in range(3):
+                assert_allclose(Fs[k], d[k] * outer(e, e) * F[k])
+        # largest entry of each variable column is close to 1
+        for k in range(3):
+            col_max = max(abs(Fs[k]).max() for Fs, F0s in lmi_s)
+            assert abs(col_max - 1) < 1e-2
+
+        assert_allclose(scaling.unscale_primal([1., 1., 1.]), d)
+        S = [F0s for Fs, F0s in lmi_s]
+        assert_allclose(scaling.unscale_slack(S)[0],
+                        lmi_coeffs[0][1].toarray() if sparse
+                        else lmi_coeffs[0][1])
+
+
+try:
+    import cvxopt
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_to_cvxopt_equilibrate():
+        from cvxopt import solvers
+        from lmi_sdp import to_cvxopt
+        solvers.options['show_progress'] = False
+
+        obj, lmis, x = _badly_scaled_problem()
+        constraints = lmis + [Eq(x[0] + x[2], -1e-2)]
+        c, Gs, hs, A, b = to_cvxopt(obj, constraints, x)
+        sol = solvers.sdp(c, Gs=Gs, hs=hs, A=A, b=b)
+
+        for linear_cone in (False, True):
+            ret = to_cvxopt(obj, constraints, x, linear_cone=linear_cone,
+                            equilibrate=True)
+            scaling = ret[-1]
+            if linear_cone:
+                c, Gl, hl, Gs, hs, A, b = ret[:-1]
+                sol_s = solvers.sdp(c, Gl, hl, Gs, hs, A, b)
+                assert scaling.linear_blocks == [False, True, True]
+            else:
+                c, Gs, hs, A, b = ret[:-1]
+                sol_s = solvers.sdp(c, Gs=Gs, hs=hs, A=A, b=b)
+            unscaled = scaling.unscale_cvxopt(sol_s)
+            assert_allclose(unscaled['x'], array(sol['x']).flatten(),
+                            rtol=1e-4, atol=1e-6)
+            assert_allclose(unscaled['zs'][0], array(sol['zs'][0]),
+                            rtol=1e-4, atol=1e-6)
+            assert_allclose(unscaled['ss'][0], array(sol['ss'][0]),
+                            rtol=1e-4, atol=1e-6)
+            if linear_cone:
+                zl = [array(z)[0, 0] for z in sol['zs'][1:]]
+                assert_allclose(unscaled['zl'], zl, rtol=1e-4, atol=1e-6)
+            assert_allclose(unscaled['y'], array(sol['y']).flatten(),
+                            rtol=1e-4, atol=1e-6)
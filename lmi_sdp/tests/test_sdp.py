@@ -1,10 +1,12 @@
-from sympy import Matrix, symbols, pi, BlockDiagMatrix
+from sympy import Matrix, symbols, pi, BlockDiagMatrix, Eq
 from sympy.abc import x, y, z
-from numpy import array
-from numpy.testing import assert_array_equal
+from numpy import array, dot
+from numpy.testing import assert_array_equal, assert_array_almost_equal
 
 from lmi_sdp import LMI_PSD, LMI_NSD, lmi_to_coeffs, objective_to_coeffs, \
-    get_variables, to_cvxopt, to_sdpa_sparse, to_sdpa_dense
+    get_variables, to_cvxopt, to_sdpa_sparse, to_sdpa_dense, \
+    split_constraints, eq_to_coeffs, eliminate_equalities, reduce_coeffs, \
+    InconsistentEqualitiesError, iter_lmi_coeffs, NonLinearMatrixError
 
 
 def test_lmi_to_coeffs():
@@ -67,11 +69,15 @@ def test_lmi_to_coeffs_split():
                   array([[0.]])],
                  array([[40.]]))]
 
-    coeffs = lmi_to_coeffs([lmi1, lmi2], vars,
-                           split_blocks=True)
-    for i in range(len(coeffs)):
-        assert_array_equal(coeffs[i][0], expected[i][0])
-        assert_array_equal(coeffs[i][1], expected[i][1])
+    for backend in ['expr', 'poly']:
+        coeffs, lmi_index = lmi_to_coeffs([lmi1, lmi2], vars,
+                                          split_blocks=True, backend=backend,
+                                          return_index=True)
+        assert lmi_index == [0, 1, 1]
+        assert len(coeffs) == len(expected)
+        for i in range(len(coeffs)):
+            assert_array_equal(coeffs[i][0], expected[i][0])
+            assert_array_equal(coeffs[i][1], expected[i][1])
 
     m3 = BlockDiagMatrix(m1-c1, -m2+c2)
     lmi3 = LMI_PSD(m3)
@@ -82,6 +88,31 @@ def test_lmi_to_coeffs_split():
         assert_array_equal(coeffs[i][1], expected[i][1])
 
 
+def test_iter_lmi_coeffs():
+    vars = [x, y, z]
+    lmi1 = LMI_PSD(Matrix([[x, y], [y, z+1]]))
+    lmi2 = LMI_NSD(Matrix([[y, 0], [0, 2*x]]), Matrix([[30, 0], [0, 40]]))
+
+    expected = lmi_to_coeffs([lmi1, lmi2], vars, split_blocks=True)
+    items = list(iter_lmi_coeffs([lmi1, lmi2], vars, split_blocks=True))
+    assert [b for b, coeffs, const in items] == [0, 1, 2]
+    for (b, coeffs, const), (ok_coeffs, ok_const) in zip(items, expected):
+        assert_array_equal(coeffs, ok_coeffs)
+        assert_array_equal(const, ok_const)
+
+    # blocks are only extracted when requested
+    lmi3 = LMI_PSD(Matrix([x*y]))
+    it = iter_lmi_coeffs([lmi1, lmi3], vars)
+    b, coeffs, const = next(it)
+    assert_array_equal(const, array([[0., 0.], [0., 1.]]))
+    except_ok = False
+    try:
+        next(it)
+    except NonLinearMatrixError:
+        except_ok = True
+    assert except_ok
+
+
 def test_objective_to_coeffs():
     vars = [x, y, z]
     assert_array_equal(objective_to_coeffs(1.2 + x - 3.4*y, vars, 'max'),
@@ -95,6 +126,62 @@ def test_objective_to_coeffs():
     assert except_ok
 
 
+def test_split_constraints():
+    lmi = LMI_PSD(Matrix([[x, y], [y, z]]))
+    eq = Eq(x + y, 1)
+    assert split_constraints([lmi, eq]) == ([lmi], [eq])
+    assert split_constraints(eq) == ([], [eq])
+
+
+def test_eq_to_coeffs():
+    vars = [x, y, z]
+    A, b = eq_to_coeffs([Eq(x + 2*y, 1), Eq(z, y - 3)], vars)
+    assert_array_equal(A, array([[1., 2., 0.], [0., -1., 1.]]))
+    assert_array_equal(b, array([1., -3.]))
+
+    A, b = eq_to_coeffs(Eq(Matrix([x, y]), Matrix([1, 2*z])), vars)
+    assert_array_equal(A, array([[1., 0., 0.], [0., 1., -2.]]))
+    assert_array_equal(b, array([1., 0.]))
+
+    except_ok = False
+    try:
+        eq_to_coeffs(Eq(x*y, 1), vars)
+    except ValueError:
+        except_ok = True
+    assert except_ok
+
+
+def test_eliminate_equalities():
+    A = array([[1., 2., 0., 1.], [2., 4., 1., 0.], [3., 6., 1., 1.]])
+    b = array([1., 3., 4.])
+    x0, N = eliminate_equalities(A, b)
+    assert N.shape == (4, 2)  # third equality is redundant
+    assert_array_almost_equal(dot(A, x0), b)
+    assert_array_almost_equal(dot(A, N), 0)
+
+    except_ok = False
+    try:
+        eliminate_equalities(A, array([1., 3., 5.]))
+    except InconsistentEqualitiesError:
+        except_ok = True
+    assert except_ok
+
+
+def test_reduce_coeffs():
+    vars = [x, y, z]
+    lmi = LMI_PSD(Matrix([[x, y], [y, z+1]]))
+    coeffs = lmi_to_coeffs(lmi, vars)
+    A, b = eq_to_coeffs(Eq(x, y + 2), vars)
+    x0, N = eliminate_equalities(A, b)
+    reduced = reduce_coeffs(coeffs, x0, N)
+    # x = y + 2 with y, z free
+    expected = ([array([[1., 1.], [1., 0.]]), array([[0., 0.], [0., 1.]])],
+                array([[2., 0.], [0., 1.]]))
+    assert_array_equal(reduced[0][0][0], expected[0][0])
+    assert_array_equal(reduced[0][0][1], expected[0][1])
+    assert_array_equal(reduced[0][1], expected[1])
+
+
 def test_get_variables():
     x1, x2, x3 = symbols('x1 x2 x3')
     variables = [x1, x2, x3]
@@ -103,6 +190,7 @@ def test_get_variables():
     lmis = [Matrix([x2]), LMI_PSD(Matrix([1.4*x2 + x1]))]
 
     assert variables == get_variables(obj, lmis)
+    assert variables == get_variables(x1, [Eq(x2, x3)])
 
 
 def test_to_sdpa_sparse():
@@ -135,6 +223,81 @@ def test_to_sdpa_sparse():
     assert ok_dat == dat
 
 
+def test_to_sdpa_sparse_equalities():
+    x1, x2 = symbols('x1 x2')
+    lmi_1 = LMI_PSD(Matrix([[x1, 1], [1, x2]]))
+
+    dat = to_sdpa_sparse(x1 + x2, [lmi_1, Eq(x1, 2*x2)], [x1, x2])
+    ok_dat = ('2 = ndim\n'
+              '3 = nblocks\n'
+              '2 1 1 = blockstruct\n'
+              '1.0, 1.0 = objcoeffs\n'
+              '0 1 1 2 -1.0\n'
+              '1 1 1 1 1.0\n'
+              '1 2 1 1 1.0\n'
+              '1 3 1 1 -1.0\n'
+              '2 1 2 2 1.0\n'
+              '2 2 1 1 -2.0\n'
+              '2 3 1 1 2.0\n')
+    assert ok_dat == dat
+
+    dat, reduction = to_sdpa_sparse(x1 + x2, [lmi_1, Eq(x1, 2*x2)],
+                                    [x1, x2], eliminate_equalities=True)
+    ok_dat = ('1 = ndim\n'
+              '1 = nblocks\n'
+              '2 = blockstruct\n'
+              '3.0 = objcoeffs\n'
+              '0 1 1 2 -1.0\n'
+              '1 1 1 1 2.0\n'
+              '1 1 2 2 1.0\n')
+    assert ok_dat == dat
+    assert reduction.expand([1.]).tolist() == [2., 1.]
+    assert reduction.offset == 0.
+
+    dat, reduction = to_sdpa_sparse(x1 + x2, [lmi_1, Eq(x1, 2*x2 + 1)],
+                                    [x1, x2], eliminate_equalities=True)
+    assert dat.splitlines()[3] == '3.0 = objcoeffs'
+    assert reduction.x0.tolist() == [1., 0.]
+    assert reduction.offset == 1.
+    assert to_sdpa_dense(x1 + x2, [lmi_1, Eq(x1, 2*x2 + 1)], [x1, x2],
+                         eliminate_equalities=True)[1].offset == 1.
+
+    dat, reduction = to_sdpa_sparse(x1 + x2, [lmi_1], [x1, x2],
+                                    eliminate_equalities=True)
+    assert dat == to_sdpa_sparse(x1 + x2, [lmi_1], [x1, x2])
+    assert reduction.N is None
+    assert reduction.expand([3., 4.]).tolist() == [3., 4.]
+
+
+def test_to_sdpa_sparse_linear_cone():
+    x1, x2 = symbols('x1 x2')
+    variables = x1, x2
+    min_obj = 10*x1 + 20*x2
+    lmi_1 = LMI_PSD(
+        -Matrix([[1, 0, 0, 0], [0, 2, 0, 0], [0, 0, 3, 0], [0, 0, 0, 4]]) +
+        Matrix([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]])*x1 +
+        Matrix([[0, 0, 0, 0], [0, 1, 0, 0], [0, 0, 5, 2], [0, 0, 2, 6]])*x2)
+
+    dat = to_sdpa_sparse(min_obj, lmi_1, variables, linear_cone=True)
+
+    ok_dat = ('2 = ndim\n'
+              '2 = nblocks\n'
+              '2 -2 = blockstruct\n'
+              '10.0, 20.0 = objcoeffs\n'
+              '0 1 1 1 3.0\n'
+              '0 1 2 2 4.0\n'
+              '0 2 1 1 1.0\n'
+              '0 2 2 2 2.0\n'
+              '1 2 1 1 1.0\n'
+              '1 2 2 2 1.0\n'
+              '2 1 1 1 5.0\n'
+              '2 1 1 2 2.0\n'
+              '2 1 2 2 6.0\n'
+              '2 2 2 2 1.0\n')
+
+    assert ok_dat == dat
+
+
 def test_to_sdpa_dense():
     x1, x2 = symbols('x1 x2')
     variables = x1, x2
@@ -190,6 +353,97 @@ def test_to_sdpa_dense():
 
     assert ok_dat == dat
 
+
+def test_to_sdpa_dense_precision_and_file():
+    from io import StringIO
+    x1, x2 = symbols('x1 x2')
+    lmi_1 = LMI_PSD(Matrix([[x1 + 1/3., x2], [x2, x1]]))
+
+    dat = to_sdpa_dense(x1, lmi_1, [x1, x2], split_blocks=False,
+                        precision=3)
+    ok_dat = ('2 = ndim\n'
+              '1 = nblocks\n'
+              '2 = blockstruct\n'
+              '1.0, 0.0 = objcoeffs\n'
+              '{\n'
+              ' {\n'
+              '  { -0.333, -0 },\n'
+              '  { -0, -0 }\n'
+              ' }\n'
+              '}\n'
+              '{\n'
+              ' {\n'
+              '  { 1, 0 },\n'
+              '  { 0, 1 }\n'
+              ' }\n'
+              '}\n'
+              '{\n'
+              ' {\n'
+              '  { 0, 1 },\n'
+              '  { 1, 0 }\n'
+              ' }\n'
+              '}\n')
+    assert ok_dat == dat
+
+    f = StringIO()
+    assert to_sdpa_dense(x1, lmi_1, [x1, x2], split_blocks=False,
+                         file=f) is None
+    assert f.getvalue() == to_sdpa_dense(x1, lmi_1, [x1, x2],
+                                         split_blocks=False)
+
+
+def test_to_sdpa_dense_linear_cone():
+    x1, x2 = symbols('x1 x2')
+    lmi_1 = LMI_PSD(Matrix([[x1 - 1, 0, 0], [0, x2, 1], [0, 1, x1]]))
+    lmi_2 = LMI_PSD(Matrix([[x2 - 3]]))
+
+    dat = to_sdpa_dense(x1 + x2, [lmi_1, lmi_2], [x1, x2], linear_cone=True)
+
+    ok_dat = ('2 = ndim\n'
+              '2 = nblocks\n'
+              '2 -2 = blockstruct\n'
+              '1.0, 1.0 = objcoeffs\n'
+              '{\n'
+              ' {\n'
+              '  { -0.0, -1.0 },\n'
+              '  { -1.0, -0.0 }\n'
+              ' }\n'
+              ' { 1.0, 3.0 }\n'
+              '}\n'
+              '{\n'
+              ' {\n'
+              '  { 0.0, 0.0 },\n'
+              '  { 0.0, 1.0 }\n'
+              ' }\n'
+              ' { 1.0, 0.0 }\n'
+              '}\n'
+              '{\n'
+              ' {\n'
+              '  { 1.0, 0.0 },\n'
+              '  { 0.0, 0.0 }\n'
+              ' }\n'
+              ' { 0.0, 1.0 }\n'
+              '}\n')
+
+    assert ok_dat == dat
+
+
+def test_to_sdpa_file_spooled():
+    from io import StringIO
+    x1, x2, x3 = symbols('x1 x2 x3')
+    lmis = [LMI_PSD(Matrix([[x1 - 1, 0, 0], [0, x2, 1], [0, 1, x1]])),
+            LMI_PSD(Matrix([[x2 - 3]])),
+            LMI_PSD(Matrix([[x3, x1 + 2], [x1 + 2, x3 - x2]])),
+            Eq(x1 + x3, 2)]
+    for func in [to_sdpa_sparse, to_sdpa_dense]:
+        for linear_cone in [False, True]:
+            f = StringIO()
+            assert func(x1 + x2, lmis, [x1, x2, x3], linear_cone=linear_cone,
+                        file=f) is None
+            assert f.getvalue() == func(x1 + x2, lmis, [x1, x2, x3],
+                                        linear_cone=linear_cone)
+
+
 try:
     from cvxopt import matrix
 except ImportError:  # pragma: no cover
@@ -231,3 +485,67 @@ else:
             assert not any(ok_Gs[i] - Gs[i])
         for i in range(len(ok_hs)):
             assert not any(ok_hs[i] - hs[i])
+
+    def test_to_cvxopt_equalities():
+        x1, x2 = symbols('x1 x2')
+        lmi_1 = LMI_PSD(Matrix([[x1, 1], [1, x2]]))
+
+        c, Gs, hs, A, b = to_cvxopt(x1 + x2, [lmi_1, Eq(x1, 2*x2)], [x1, x2])
+        assert not any(matrix([[1.], [-2.]]) - A)
+        assert not any(matrix([0.]) - b)
+
+        c, Gs, hs, reduction = to_cvxopt(x1 + x2, [lmi_1, Eq(x1, 2*x2)],
+                                         [x1, x2], eliminate_equalities=True)
+        assert not any(matrix([3.]) - c)
+        assert not any(matrix([[-2., 0., 0., -1.]]) - Gs[0])
+
+        # min x1 + x2 s.t. x1*x2 >= 1, x1 = 2*x2 + 1, i.e., x = (2, 0.5)
+        from cvxopt import solvers
+        c, Gs, hs, reduction = to_cvxopt(x1 + x2, [lmi_1, Eq(x1, 2*x2 + 1)],
+                                         [x1, x2], eliminate_equalities=True)
+        sol = solvers.sdp(c, Gs=Gs, hs=hs, options={'show_progress': False})
+        assert_array_almost_equal(reduction.expand(sol['x']), [2., 0.5], 5)
+        assert abs(sol['primal objective'] + reduction.offset - 2.5) < 1e-6
+
+    def test_to_cvxopt_linear_cone():
+        x1, x2 = symbols('x1 x2')
+        lmi_1 = LMI_PSD(Matrix([[x1 - 1, 0, 0], [0, x2, 1], [0, 1, x1]]))
+        lmi_2 = LMI_PSD(Matrix([[x2 - 3]]))
+
+        c, Gl, hl, Gs, hs = to_cvxopt(x1 + x2, [lmi_1, lmi_2], [x1, x2],
+                                      linear_cone=True)
+        assert not any(matrix([[-1., 0.], [0., -1.]]) - Gl)
+        assert not any(matrix([-1., -3.]) - hl)
+        assert len(Gs) == 1
+        assert not any(matrix([[0., 0., 0., -1.], [-1., 0., 0., 0.]]) - Gs[0])
+
+        c, Gl, hl, Gs, hs = to_cvxopt(x1 + x2, lmi_1, [x1, x2],
+                                      split_blocks=False, linear_cone=True)
+        assert Gl.size == (0, 2)
+        assert hl.size == (0, 1)
+
+
+try:
+    import scipy
+except ImportError:  # pragma: no cover
+    pass
+else:
+
+    def test_eliminate_equalities_sparse():
+        from scipy.sparse import csr_matrix
+        A = array([[1., 2., 0., 1.], [2., 4., 1., 0.], [3., 6., 1., 1.]])
+        b = array([1., 3., 4.])
+        x0, N = eliminate_equalities(A, b)
+        x0_s, N_s = eliminate_equalities(csr_matrix(A), b, sparse=True)
+        assert N_s.format == 'csc'
+        assert_array_almost_equal(x0_s, x0)
+        assert_array_almost_equal(N_s.toarray(), N)
+        x0_s, N_s = eliminate_equalities(csr_matrix(A), b)
+        assert_array_almost_equal(N_s, N)
+
+        except_ok = False
+        try:
+            eliminate_equalities(csr_matrix(A), array([1., 3., 5.]))
+        except InconsistentEqualitiesError:
+            except_ok = True
+        assert except_ok
@@ -0,0 +1,108 @@
+import os
+
+from sympy import Matrix, symbols, Eq
+from sympy.abc import x, y, z
+from numpy.testing import assert_array_equal
+
+from lmi_sdp import LMI_PSD, LMI_NSD, CoeffStore, iter_lm_triplets, \
+    lmi_to_coeffs, to_sdpa_sparse
+
+
+def test_iter_lm_triplets():
+    m = Matrix([[x + 1, 2*y], [2*y, 0]])
+    assert sorted(iter_lm_triplets(m, [x, y])) == \
+        [(0, 0, 0, 1.0), (1, 0, 0, 1.0), (2, 0, 1, 2.0), (2, 1, 0, 2.0)]
+    assert sorted(iter_lm_triplets(m, [x, y], upper=True)) == \
+        [(0, 0, 0, 1.0), (1, 0, 0, 1.0), (2, 0, 1, 2.0)]
+
+
+def test_coeff_store():
+    store = CoeffStore(2, memory_budget=1)  # one record per chunk
+    directory = store.directory
+    store.add_block(2, [(0, 0, 0, 1.5), (1, 0, 1, 2.0), (2, 1, 1, -1.0)])
+    store.add_block(1, [(1, 0, 0, 3.0)])
+    assert len(store) == 4
+    assert store.block_sizes == [2, 1]
+    assert store.block_diagonal == [False, True]
+    assert sum(len(chunk[0]) for chunk in store.iter_chunks()) == 4
+
+    coeffs = store.to_coeffs()
+    assert_array_equal(coeffs[0][1].toarray(), [[1.5, 0.], [0., 0.]])
+    assert_array_equal(coeffs[0][0][0].toarray(), [[0., 2.], [2., 0.]])
+    assert_array_equal(coeffs[0][0][1].toarray(), [[0., 0.], [0., -1.]])
+    assert_array_equal(coeffs[1][0][0].toarray(), [[3.]])
+
+    store.close()
+    assert not os.path.exists(directory)
+
+
+def test_lmi_to_coeffs_out_of_core():
+    vars = [x, y, z]
+    lmi1 = LMI_PSD(Matrix([[x, y], [y, z+1]]), Matrix([[0, 1], [1, 2]]))
+    lmi2 = LMI_NSD(Matrix([[y, 0], [0, 2*x]]), Matrix([[30, 0], [0, 40]]))
+
+    expected = lmi_to_coeffs([lmi1, lmi2], vars, sparse=True)
+    with lmi_to_coeffs([lmi1, lmi2], vars, out_of_core=True,
+                       memory_budget=50) as store:
+        coeffs = store.to_coeffs()
+    for (ok_LMis, ok_LM0), (LMis, LM0) in zip(expected, coeffs):
+        assert_array_equal(LM0.toarray(), ok_LM0.toarray())
+        for ok_LMi, LMi in zip(ok_LMis, LMis):
+            assert_array_equal(LMi.toarray(), ok_LMi.toarray())
+
+
+def _sdpa_lines(dat):
+    header = dat.splitlines()[:4]
+    return header, sorted(dat.splitlines()[4:])
+
+
+def test_to_sdpa_sparse_out_of_core():
+    x1, x2 = symbols('x1 x2')
+    variables = x1, x2
+    min_obj = 10*x1 + 20*x2
+    lmi_1 = LMI_PSD(
+        -Matrix([[1, 0, 0, 0], [0, 2, 0, 0], [0, 0, 3, 0], [0, 0, 0, 4]]) +
+        Matrix([[1, 0, 0, 0], [0, 1, 0, 0], [0, 0, 0, 0], [0, 0, 0, 0]])*x1 +
+        Matrix([[0, 0, 0, 0], [0, 1, 0, 0], [0, 0, 5, 2], [0, 0, 2, 6]])*x2)
+    constraints = [lmi_1, Eq(x1, 2*x2 + 1)]
+
+    for linear_cone in [False, True]:
+        dat = to_sdpa_sparse(min_obj, constraints, variables,
+                             linear_cone=linear_cone)
+        dat_ooc = to_sdpa_sparse(min_obj, constraints, variables,
+                                 linear_cone=linear_cone, out_of_core=True,
+                                 memory_budget=100)
+        assert _sdpa_lines(dat) == _sdpa_lines(dat_ooc)
+
+    except_ok = False
+    try:
+        to_sdpa_sparse(min_obj, constraints, variables, out_of_core=True,
+                       eliminate_equalities=True)
+    except ValueError:
+        except_ok = True
+    assert except_ok
+
+
+def test_sdpa_sparse_from_store_memory():
+    import tracemalloc
+    from lmi_sdp.sdp import _sdpa_sparse_from_store
+
+    class _NullFile(object):
+        def write(self, s):
+            pass
+
+    memory_budget = 2**16
+    n = 200
+    with CoeffStore(2, memory_budget=memory_budget) as store:
+        store.add_block(n, ((k, i, j, 0.1*i - j/7.)
+                            for k in range(3) for i in range(n)
+                            for j in range(i, n, 3)))
+        tracemalloc.start()
+        try:
+            _sdpa_sparse_from_store([1., 2.], store, None, False,
+                                    _NullFile())
+            peak = tracemalloc.get_traced_memory()[1]
+        finally:
+            tracemalloc.stop()
+    assert len(store) > 4 * store.chunk_size
+    assert peak < 2 * memory_budget
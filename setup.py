@@ -24,7 +24,7 @@ setup(
     keywords='LMI SDP',
     url='http://github.com/cdsousa/PyLMI-SDP',
     packages=['lmi_sdp'],
-    install_requires=['sympy', 'packaging'],
+    install_requires=['sympy', 'numpy'],
     long_description=long_description,
     long_description_content_type="text/markdown",
     classifiers=[